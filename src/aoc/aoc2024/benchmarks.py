@@ -0,0 +1,42 @@
+import dataclasses
+
+import aoc.helpers as helpers
+from aoc.aoc2024 import code09, code10, code13, code14
+
+
+def benchmark_value_types(n=200_000):
+    """Time building and hashing n grid coordinates with validation on and off, then
+    time building n of each bulk-created puzzle record, as declared and as an equivalent
+    dataclass without slots.
+    """
+    saved_validate = helpers.VALIDATE
+    try:
+        for validate in [True, False]:
+            helpers.VALIDATE = validate
+            print(f"RectCoord and RectOffset, validate={validate}")
+            with helpers.MemoryTimer():
+                coords = {helpers.RectCoord(n, 1, i, 0) for i in range(n)}
+                offsets = {helpers.RectOffset(i, -i) for i in range(n)}
+                del coords, offsets
+    finally:
+        helpers.VALIDATE = saved_validate
+
+    samples = [
+        (code09.Segment, ("file", 3, 7)),
+        (code10.Step, ((0, 0), (0, 1), 1, 2)),
+        (code13.Machine, ((94, 34), (22, 67), (8400, 5400))),
+        (code14.Robot, ((0, 4), (3, -3))),
+    ]
+    for cls, args in samples:
+        unslotted = dataclasses.make_dataclass(
+            cls.__name__, [field.name for field in dataclasses.fields(cls)]
+        )
+        for variant, label in [(unslotted, "without slots"), (cls, "with slots")]:
+            print(f"{n} x {cls.__name__} {label}")
+            with helpers.MemoryTimer():
+                records = [variant(*args) for _ in range(n)]
+                del records
+
+
+if __name__ == "__main__":
+    benchmark_value_types()
@@ -1,22 +1,58 @@
-from collections import Counter
+import bisect
+import itertools
+import operator
+from array import array
 
 
-def transpose(iterables):
-    return zip(*iterables)
+def read_columns(input_file, chunk_size=1 << 20):
+    """Read the two columns of location IDs into compact array("q") buffers.
+
+    The input is read in chunks of about chunk_size characters, each split and converted
+    in bulk, so memory beyond the two arrays is bounded by the chunk size.
+    """
+    left = array("q")
+    right = array("q")
+    while lines := input_file.readlines(chunk_size):
+        tokens = "".join(lines).split()
+        assert len(tokens) % 2 == 0
+        left.extend(map(int, itertools.islice(tokens, 0, None, 2)))
+        right.extend(map(int, itertools.islice(tokens, 1, None, 2)))
+    return left, right
+
+
+def sorted_column(column):
+    """Return a sorted copy of column, as another array("q") buffer."""
+    return array(column.typecode, sorted(column))
+
+
+def total_distance(left, right):
+    """Sum of the distances between the sorted columns, paired up in order."""
+    return sum(map(abs, map(operator.sub, left, right)))
+
+
+def similarity_score(left, right):
+    """Sum of each left value times the number of times it appears in right, for sorted
+    columns.
+
+    Equal values are runs in both columns, so this merges the columns run by run, finding
+    the end of each run by bisection rather than counting values one at a time.
+    """
+    total = 0
+    i = lo = 0
+    while i < len(left):
+        value = left[i]
+        j = bisect.bisect_right(left, value, i)
+        lo = bisect.bisect_left(right, value, lo)
+        hi = bisect.bisect_right(right, value, lo)
+        total += value * (j - i) * (hi - lo)
+        i, lo = j, hi
+    return total
 
 
 def run(input_file, part):
     assert part in (1, 2)
-    assert part in (1, 2)
-
+    left, right = map(sorted_column, read_columns(input_file))
     if part == 1:
-        pairs = [map(int, line.split()) for line in input_file]
-        sorted_pairs = transpose(map(sorted, transpose(pairs)))
-        total_dist = sum(abs(left - right) for left, right in sorted_pairs)
-        return total_dist
+        return total_distance(left, right)
     else:
-        pairs = [tuple(map(int, line.split())) for line in input_file]
-        left, right = transpose(pairs)
-        counts = Counter(right)
-        score = sum(el * counts[el] for el in left)
-        return score
+        return similarity_score(left, right)
@@ -1,29 +1,43 @@
-def is_monotonic(lis):
-    return lis == sorted(lis) or lis == sorted(lis, reverse=True)
-
-
-def is_delta_safe(lis):
-    return all(abs(lis[i + 1] - lis[i]) in {1, 2, 3} for i in range(len(lis) - 1))
-
-
-def is_safe(lis):
-    return is_monotonic(lis) and is_delta_safe(lis)
-
-
-def is_one_safe(lis):
-    if is_safe(lis):
-        return True
-    for i in range(len(lis)):
-        if is_safe(lis[:i] + lis[i + 1 :]):
+def first_violation(levels, sign, skip=None):
+    """Return the indices (i, j) of the first pair of adjacent levels, ignoring index
+    skip, whose delta isn't 1..3 in the direction of sign, or None if there isn't one.
+    """
+    prev = None
+    for i, level in enumerate(levels):
+        if i == skip:
+            continue
+        if prev is not None and not 1 <= sign * (level - levels[prev]) <= 3:
+            return prev, i
+        prev = i
+    return None
+
+
+def is_safe(levels):
+    return any(first_violation(levels, sign) is None for sign in (1, -1))
+
+
+def is_one_safe(levels):
+    """True if levels is safe after removing at most one level.
+
+    Any fix has to remove one of the two levels of the first violation, so for each
+    direction there are only two candidates to check, keeping the check linear.
+    """
+    for sign in (1, -1):
+        violation = first_violation(levels, sign)
+        if violation is None:
+            return True
+        if any(first_violation(levels, sign, skip) is None for skip in violation):
             return True
     return False
 
 
+def count_safe(reports, dampened=False):
+    """Count the safe reports in an iterable of level sequences."""
+    check = is_one_safe if dampened else is_safe
+    return sum(map(check, reports))
+
+
 def run(input_file, part):
     assert part in (1, 2)
-    if part == 1:
-        lists = [list(map(int, line.split())) for line in input_file]
-        return sum(is_monotonic(lis) and is_delta_safe(lis) for lis in lists)
-    else:
-        lists = [list(map(int, line.split())) for line in input_file]
-        return sum(is_one_safe(lis) for lis in lists)
+    reports = (list(map(int, line.split())) for line in input_file)
+    return count_safe(reports, dampened=part == 2)
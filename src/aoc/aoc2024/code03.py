@@ -1,32 +1,75 @@
-from aoc.helpers import read_input_sections
 import re
 
+TOKEN_PATTERN = re.compile(r"mul\(([0-9]+),([0-9]+)\)|(do)\(\)|(don't)\(\)")
+# a possibly incomplete token running up to the end of the text
+PARTIAL_TOKEN_PATTERN = re.compile(
+    r"m(?:u(?:l(?:\((?:[0-9]+(?:,[0-9]*)?)?)?)?)?|d(?:o(?:\(|n(?:'(?:t\(?)?)?)?)?"
+)
 
-def run(input_file, part):
-    sections = read_input_sections(input_file)
-    assert len(sections) in (1, 2)
-    contents = "".join(sections[(part - 1) % len(sections)])
+
+class MemoryScanner:
+    """Scan corrupted memory fed in pieces, keeping both the unconditional total of the
+    mul instructions and the total gated by do() and don't().
+
+    Tokens may be split across pieces, so the tail of each piece that could start a token
+    is carried over to the next.  Only that tail is kept, so memory use doesn't grow with
+    the input.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.gated_total = 0
+        self.enabled = True
+        self.carry = ""
+
+    def feed(self, text):
+        text = self.carry + text
+        end = 0
+        for match in TOKEN_PATTERN.finditer(text):
+            a, b, do, dont = match.groups()
+            if a is not None:
+                product = int(a) * int(b)
+                self.total += product
+                if self.enabled:
+                    self.gated_total += product
+            else:
+                self.enabled = do is not None
+            end = match.end()
+
+        # every token starts with its only 'm' or 'd', so a partial token at the end of
+        # the text starts at the last of these
+        start = max(text.rfind("m", end), text.rfind("d", end))
+        if start >= 0 and PARTIAL_TOKEN_PATTERN.fullmatch(text, start):
+            self.carry = text[start:]
+        else:
+            self.carry = ""
+
+
+def scan_sections(input_file, chunk_size=1 << 20):
+    """Scan input_file in chunks of chunk_size characters and return a MemoryScanner for
+    each section.  As with helpers.read_input_sections, sections are separated by an empty
+    line and the lines of a section are joined without newlines.
+    """
+    scanners = [MemoryScanner()]
+    pending = ""
+    while chunk := input_file.read(chunk_size):
+        text = pending + chunk
+        # hold back a lone trailing newline in case it starts a section break
+        pending = "\n" if text.endswith("\n") and not text.endswith("\n\n") else ""
+        if pending:
+            text = text[:-1]
+        for i, part in enumerate(text.split("\n\n")):
+            if i:
+                scanners.append(MemoryScanner())
+            scanners[-1].feed(part.replace("\n", ""))
+    return scanners
+
+
+def run(input_file, part, chunk_size=1 << 20):
+    scanners = scan_sections(input_file, chunk_size)
+    assert len(scanners) in (1, 2)
+    scanner = scanners[(part - 1) % len(scanners)]
     if part == 1:
-        matches = re.findall(r"mul\(([0-9]+),([0-9]+)\)", contents)
-        return sum(int(m[0]) * int(m[1]) for m in matches)
+        return scanner.total
     else:
-        matches = re.finditer(
-            r"(?P<cmd1>mul)\((?P<a>[0-9]+),(?P<b>[0-9]+)\)|(?P<cmd2>do)\(\)|(?P<cmd3>don't)\(\)",
-            contents,
-        )
-
-        adding = True
-        total = 0
-        for match in matches:
-            cmd = match["cmd1"] or match["cmd2"] or match["cmd3"]
-
-            match cmd:
-                case "mul":
-                    if adding:
-                        total += int(match["a"]) * int(match["b"])
-                case "do":
-                    adding = True
-                case "don't":
-                    adding = False
-
-        return total
+        return scanner.gated_total
@@ -1,86 +1,148 @@
-def transpose(matrix):
-    return list(zip(*matrix))
-
-
-def convert_to_string(chars):
-    return "".join(chars)
-
-
-def generate_diagonal_strings(starts, increment, n_rows, n_cols, data):
-    max_len = max(n_rows, n_cols)
-    strings = []
-    for start_row, start_col in starts:
-        chars = []
-        for i in range(max_len):
-            row, col = start_row + i * increment[0], start_col + i * increment[1]
-            if 0 <= row < n_rows and 0 <= col < n_cols:
-                chars.append(data[row][col])
-            else:
-                break
-        strings.append("".join(chars))
-    return strings
-
-
-def count_patterns(patterns, strings):
-    return sum(string.count(pattern) for pattern in patterns for string in strings)
-
-
-def match_patterns(patterns, submatrix):
-    return sum(
-        all(pattern[r][c] in (submatrix[r][c], ".") for r in range(3) for c in range(3))
-        for pattern in patterns
-    )
-
-
-def get_submatrix(matrix, start_row, start_col):
-    return [[matrix[start_row + r][start_col + c] for c in range(3)] for r in range(3)]
-
-
-def calculate_matches(rows, patterns):
-    n_rows, n_cols = len(rows), len(rows[0])
-    return sum(
-        match_patterns(patterns, get_submatrix(rows, r, c))
-        for r in range(n_rows - 2)
-        for c in range(n_cols - 2)
-    )
-
-
-def run(input_file, part):
-    if part == 1:
-        rows = [list(line.strip()) for line in input_file]
-
-        patterns = ["XMAS", "SAMX"]
-        n_rows, n_cols = len(rows), len(rows[0])
-
-        row_strings = [convert_to_string(row) for row in rows]
-        col_strings = [convert_to_string(col) for col in transpose(rows)]
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+
+DIRECTIONS = [(di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1) if (di, dj) != (0, 0)]
+
+XMAS_MASKS = [
+    ["M.S", ".A.", "M.S"],
+    ["M.M", ".A.", "S.S"],
+    ["S.M", ".A.", "S.M"],
+    ["S.S", ".A.", "M.M"],
+]
+
+
+@dataclass
+class Mask:
+    """A pattern compiled for matching around an anchor cell of a flat grid buffer.
+
+    cells holds (stride, char) for the other cells, with stride the offset from the
+    anchor in the buffer.  An anchor at (row, col) is only tried for rows in row_range and
+    cols in col_range, so that no cell falls off the grid or wraps onto another row.
+    """
+
+    anchor: str
+    cells: list[tuple[int, str]]
+    row_range: range
+    col_range: range
+
+    @classmethod
+    def from_cells(cls, cells, nrows, ncols, anchor=None):
+        """Compile a mask from a list of ((di, dj), char).  The anchor is the first cell
+        whose char is anchor, or the first cell if anchor is None.
+        """
+        if anchor is None:
+            anchor = cells[0][1]
+        (ai, aj), _ = next(cell for cell in cells if cell[1] == anchor)
+        rel = [((i - ai, j - aj), char) for (i, j), char in cells]
+        dis = [di for (di, _), _ in rel]
+        djs = [dj for (_, dj), _ in rel]
+        return cls(
+            anchor,
+            [(di * ncols + dj, char) for (di, dj), char in rel if (di, dj) != (0, 0)],
+            range(-min(dis), nrows - max(dis)),
+            range(-min(djs), ncols - max(djs)),
+        )
 
-        forward_diagonal_starts = [(r, 0) for r in range(1, n_rows)] + [
-            (0, c) for c in range(n_cols)
-        ]
-        backward_diagonal_starts = [(0, c) for c in range(n_cols)] + [
-            (r, n_cols - 1) for r in range(1, n_rows)
+    @classmethod
+    def from_rows(cls, rows, nrows, ncols, anchor=None, wildcard="."):
+        cells = [
+            ((i, j), char)
+            for i, row in enumerate(rows)
+            for j, char in enumerate(row)
+            if char != wildcard
         ]
-
-        forward_strings = generate_diagonal_strings(
-            forward_diagonal_starts, (1, 1), n_rows, n_cols, rows
+        return cls.from_cells(cells, nrows, ncols, anchor)
+
+
+class WordSearch:
+    """A grid of letters held as one flat string, searched by checking each pattern
+    directly from the positions of its anchor letter.
+    """
+
+    def __init__(self, lines):
+        self.nrows = len(lines)
+        self.ncols = len(lines[0]) if lines else 0
+        assert all(len(line) == self.ncols for line in lines)
+        self.buffer = "".join(lines)
+
+    @classmethod
+    def from_file(cls, input_file):
+        return cls([line.strip() for line in input_file if line.strip()])
+
+    def anchors(self, char):
+        """Yield the buffer index of each occurrence of char."""
+        buffer = self.buffer
+        index = buffer.find(char)
+        while index >= 0:
+            yield index
+            index = buffer.find(char, index + 1)
+
+    def count_masks(self, masks):
+        """Count the placements of each mask in masks, summed over masks."""
+        by_anchor = defaultdict(list)
+        for mask in masks:
+            by_anchor[mask.anchor].append(mask)
+
+        buffer = self.buffer
+        ncols = self.ncols
+        count = 0
+        for anchor, anchor_masks in by_anchor.items():
+            for index in self.anchors(anchor):
+                row, col = divmod(index, ncols)
+                for mask in anchor_masks:
+                    if (
+                        row in mask.row_range
+                        and col in mask.col_range
+                        and all(buffer[index + s] == c for s, c in mask.cells)
+                    ):
+                        count += 1
+        return count
+
+    def count_words(self, words, directions=DIRECTIONS):
+        """Count the occurrences of words read along any of directions.  A palindrome is
+        counted once for each direction it reads in.
+
+        A word along a direction is its letters at a fixed stride in the buffer, so each
+        (word, stride) is one regular expression, a lookahead for the letters with
+        stride - 1 arbitrary characters between them, and the regex engine checks it from
+        every occurrence of the first letter.  The search runs over a copy of the buffer
+        with a newline after every row: a word that would wrap onto the next row has to
+        pass through a newline, so it never matches.  A backwards stride is searched
+        forwards, for the reversed word.
+        """
+        width = self.ncols + 1
+        padded = "".join(
+            self.buffer[i : i + self.ncols] + "\n"
+            for i in range(0, len(self.buffer), max(self.ncols, 1))
         )
-        backward_strings = generate_diagonal_strings(
-            backward_diagonal_starts, (1, -1), n_rows, n_cols, rows
+        count = 0
+        for word in words:
+            for di, dj in directions:
+                stride = di * width + dj
+                target = word if stride > 0 else word[::-1]
+                gap = f".{{{abs(stride) - 1}}}"
+                pattern = re.compile(
+                    "(?=" + gap.join(map(re.escape, target)) + ")", re.DOTALL
+                )
+                count += len(pattern.findall(padded))
+        return count
+
+    def count_patterns(self, patterns, anchor=None, wildcard="."):
+        """Count the placements of 2D patterns given as lists of rows, where wildcard
+        matches any letter.
+        """
+        return self.count_masks(
+            [
+                Mask.from_rows(rows, self.nrows, self.ncols, anchor, wildcard)
+                for rows in patterns
+            ]
         )
 
-        all_strings = row_strings + col_strings + forward_strings + backward_strings
 
-        return count_patterns(patterns, all_strings)
+def run(input_file, part):
+    search = WordSearch.from_file(input_file)
+    if part == 1:
+        return search.count_words(["XMAS"])
     else:
-        rows = [list(line.strip()) for line in input_file]
-
-        patterns = [
-            ["M.S", ".A.", "M.S"],
-            ["M.M", ".A.", "S.S"],
-            ["S.M", ".A.", "S.M"],
-            ["S.S", ".A.", "M.M"],
-        ]
-
-        count_matches = calculate_matches(rows, patterns)
-        return count_matches
+        return search.count_patterns(XMAS_MASKS, anchor="A")
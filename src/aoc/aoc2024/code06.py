@@ -1,6 +1,5 @@
 import aoc.helpers as helpers
 from enum import Enum
-import copy
 
 POS_MARKERS = "<>^v"
 
@@ -62,7 +61,7 @@ def gen_move(grid, guard_position, guard_direction, nrows, ncols):
 
 
 def part1(grid):
-    grid = copy.deepcopy(grid)
+    grid = grid.copy()
     start_guard_position = find_guard_position(grid)
     start_guard_direction = find_guard_direction(grid)
 
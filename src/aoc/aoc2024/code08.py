@@ -1,6 +1,7 @@
 import itertools
+import math
 from collections import defaultdict
-from typing import Generator, Callable
+from typing import Generator
 
 import aoc.helpers as helpers
 from aoc.helpers import RectGrid
@@ -15,61 +16,81 @@ def group_antennas_by_id(grid: RectGrid) -> dict:
     return dict(antenna_dict)
 
 
-def calculate_new_position(i1: int, j1: int, i2: int, j2: int, steps: int) -> tuple:
-    """Calculate new grid position based on steps along the line connecting two points."""
-    return i1 + steps * (i2 - i1), j1 + steps * (j2 - j1)
-
-
-def generate_fundamental_antinodes(
-    grid: RectGrid, i1: int, j1: int, i2: int, j2: int
-) -> Generator[tuple, None, None]:
-    """Yield antinodes that exist at fundamental steps relative to the two points."""
-    assert (i1, j1) < (i2, j2)
-    for steps in [-1, 2]:
-        pos = calculate_new_position(i1, j1, i2, j2, steps)
-        if pos in grid:
-            yield pos
-
-
-def generate_resonant_antinodes(
-    grid: RectGrid, i1: int, j1: int, i2: int, j2: int
-) -> Generator[tuple, None, None]:
-    """Yield antinodes that exist at a range of resonant steps for the two points."""
-    assert (i1, j1) < (i2, j2)
-    for step_range in [itertools.count(), itertools.count(-1, -1)]:
-        for steps in step_range:
-            pos = calculate_new_position(i1, j1, i2, j2, steps)
-            if pos in grid:
-                yield pos
-            else:
-                break
+def steps_in_bounds(start: int, step: int, size: int) -> int:
+    """Return the number of k >= 0 with 0 <= start + k * step < size, for a start in
+    range(size) and a nonzero step.
+    """
+    if step > 0:
+        return (size - 1 - start) // step + 1
+    else:
+        return start // -step + 1
+
+
+def fundamental_antinodes(
+    nrows: int, ncols: int, i1: int, j1: int, i2: int, j2: int
+) -> Generator[int, None, None]:
+    """Yield the flat grid index of each antinode at a fundamental step from the two
+    points, i.e. on their line at the same distance again beyond either point.
+    """
+    for i, j in [(2 * i1 - i2, 2 * j1 - j2), (2 * i2 - i1, 2 * j2 - j1)]:
+        if 0 <= i < nrows and 0 <= j < ncols:
+            yield i * ncols + j
+
 
+def resonant_slice(nrows: int, ncols: int, i1: int, j1: int, i2: int, j2: int) -> slice:
+    """Return a slice of the flat grid indices covering every grid position in line with
+    the two points.
 
-def generate_antinodes_for_pairs(
-    *, grid: RectGrid, antenna_dict: dict, antinode_gen: Callable
-) -> dict:
-    """Generate antinodes for all pairs of antennas using a specified generator."""
-    antinode_dict = defaultdict(list)
-    for letter, positions in antenna_dict.items():
-        for i1, j1 in positions:
-            for i2, j2 in positions:
-                if (i1, j1) < (i2, j2):
-                    antinode_dict[letter].extend(antinode_gen(grid, i1, j1, i2, j2))
-    return dict(antinode_dict)
+    The step between the points is reduced by the gcd of its components so that every
+    grid position on the line is included, and the number of steps that stay in bounds
+    each way is computed directly rather than by walking the line.
+    """
+    di, dj = i2 - i1, j2 - j1
+    g = math.gcd(di, dj)
+    di, dj = di // g, dj // g
+    # orient the step so it moves forward through the flat indices
+    if (di, dj) < (0, 0):
+        di, dj = -di, -dj
+
+    def n_steps(di, dj):
+        counts = [steps_in_bounds(i1, di, nrows) if di else math.inf]
+        counts.append(steps_in_bounds(j1, dj, ncols) if dj else math.inf)
+        return min(counts)
+
+    n_back, n_forward = n_steps(-di, -dj), n_steps(di, dj)
+    stride = di * ncols + dj
+    first = i1 * ncols + j1 - (n_back - 1) * stride
+    last = first + (n_back + n_forward - 2) * stride
+    return slice(first, last + 1, stride)
+
+
+def mark_antinodes_for_pairs(
+    *, grid: RectGrid, antenna_dict: dict, resonant: bool
+) -> bytearray:
+    """Return a bitmap of the grid, in flat row-major order, with a 1 for each antinode of
+    any pair of antennas of the same frequency.
+    """
+    nrows, ncols = grid.nrows, grid.ncols
+    bitmap = bytearray(nrows * ncols)
+    for positions in antenna_dict.values():
+        for (i1, j1), (i2, j2) in itertools.combinations(positions, 2):
+            if resonant:
+                line = resonant_slice(nrows, ncols, i1, j1, i2, j2)
+                bitmap[line] = b"\x01" * len(range(line.start, line.stop, line.step))
+            else:
+                for index in fundamental_antinodes(nrows, ncols, i1, j1, i2, j2):
+                    bitmap[index] = 1
+    return bitmap
 
 
 def calculate_antinodes_for_mode(*, grid: RectGrid, mode: str) -> int:
     """Run the calculation of antinodes for the specified mode."""
-    antinode_gen = {
-        "fundamental": generate_fundamental_antinodes,
-        "resonant": generate_resonant_antinodes,
-    }[mode]
+    resonant = {"fundamental": False, "resonant": True}[mode]
     antenna_dict = group_antennas_by_id(grid)
-    antinode_dict = generate_antinodes_for_pairs(
-        grid=grid, antenna_dict=antenna_dict, antinode_gen=antinode_gen
+    bitmap = mark_antinodes_for_pairs(
+        grid=grid, antenna_dict=antenna_dict, resonant=resonant
     )
-    unique_antinodes = {pos for posns in antinode_dict.values() for pos in posns}
-    return len(unique_antinodes)
+    return bitmap.count(1)
 
 
 def run(input_file, part):
@@ -3,7 +3,7 @@ import itertools
 import aoc.helpers as helpers
 
 
-@dataclass
+@dataclass(slots=True)
 class Segment:
     segment_type: str
     length: int
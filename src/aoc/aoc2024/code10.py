@@ -26,7 +26,7 @@ def process_sections(sections) -> RectGrid:
     return RectGrid(sections[0])
 
 
-@dataclass
+@dataclass(slots=True)
 class Step:
     pos1: tuple
     pos2: tuple
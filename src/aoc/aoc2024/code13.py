@@ -23,7 +23,7 @@ def parse_args() -> PuzzleSize:
     return PuzzleSize(args.input_type)
 
 
-@dataclass
+@dataclass(slots=True)
 class Machine:
     a: tuple
     b: tuple
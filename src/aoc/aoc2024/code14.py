@@ -6,7 +6,7 @@ from dataclasses import dataclass
 import aoc.helpers as helpers
 
 
-@dataclass
+@dataclass(slots=True)
 class Robot:
     p: tuple[int]
     v: tuple[int]
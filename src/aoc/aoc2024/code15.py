@@ -66,6 +66,8 @@ def run_part1(processed_input):
             if grid[pos] == "@":
                 break
 
+        # replay the moves on a copy, leaving the processed input unchanged
+        grid = grid.copy()
         for move in moves:
             grid, pos = make_move(grid, pos, move)
 
@@ -176,6 +178,8 @@ def run_part2(processed_input):
             if grid[pos] == "@":
                 break
 
+        # replay the moves on a copy, leaving the processed input unchanged
+        grid = grid.copy()
         for move in moves:
             grid, pos = make_move2(grid, pos, move)
 
@@ -1,82 +1,20 @@
-import itertools
-from collections import defaultdict
+import heapq
+from dataclasses import dataclass
 
 import aoc.helpers as helpers
 from aoc.helpers import RectGrid
 
+# Directions are indexed so that turning left or right is a step of +/-1 mod 4
+DIRECTIONS = ">v<^"
+INCS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+TURN_COST = 1000
+STEP_COST = 1
+
 
 def process_sections(sections):
     return list(map(RectGrid, sections))
 
 
-def grid_edges(grid):
-    edges = defaultdict(set)
-    for pos in grid:
-        if grid[pos] != "#":
-            for neighbor in grid.neighbors(pos):
-                if grid[neighbor] != "#":
-                    edges[pos].add(neighbor)
-    return edges
-
-
-def neighbor_costs(state, edges, sign=1):
-    pos, dirn = state
-    neighboring_dirns = "<>" if dirn in "^v" else "^v"
-
-    for neighboring_dirn in neighboring_dirns:
-        yield (pos, neighboring_dirn), 1000
-    for neighboring_pos in edges[pos]:
-        if (
-            sign * (pos[0] - neighboring_pos[0]),
-            sign * (pos[1] - neighboring_pos[1]),
-        ) != {
-            ">": (0, 1),
-            "<": (0, -1),
-            "^": (-1, 0),
-            "v": (1, 0),
-        }[dirn]:
-            continue
-        yield (neighboring_pos, dirn), 1
-
-
-def score1(grid, start, end):
-    # We want a graph of positions to positions
-    # The "real" graph includes rotation but find those dynamically
-    edges = grid_edges(grid)
-    to_score = set(itertools.product(edges, "<>^v"))
-
-    HUGE = 10**9
-
-    scores = defaultdict(lambda: HUGE)
-    fringe = set()
-
-    def update_score(state, score):
-        scores[state] = min(scores[state], score)
-        for n_state, cost in neighbor_costs(state, edges):
-            scores[n_state] = min(scores[n_state], score + cost)
-            if n_state in to_score:
-                fringe.add(n_state)
-
-        to_score.remove(state)
-        fringe.remove(state)
-
-    for dirn in "<>^v":
-        fringe.add((end, dirn))
-        scores[(end, dirn)] = 0
-        update_score((end, dirn), 0)
-
-    while to_score:
-        min_state, min_score = None, None
-        for state in fringe:
-            if min_state is None or scores[state] < min_score:
-                min_state = state
-                min_score = scores[state]
-        assert min_state is not None
-        update_score(min_state, min_score)
-
-    return scores[(start, ">")], scores
-
-
 def grid_match(grid, c):
     matches = [pos for pos in grid if grid[pos] == c]
 
@@ -84,41 +22,97 @@ def grid_match(grid, c):
     return matches[0]
 
 
-def run_part1(grids):
-    return [
-        score1(grid, start=grid_match(grid, "S"), end=grid_match(grid, "E"))[0]
-        for grid in grids
-    ]
+def state_index(grid, pos, dirn):
+    """Index of the state (pos, dirn) in the flat distance arrays."""
+    return (pos[0] * grid.ncols + pos[1]) * 4 + dirn
+
 
+def dijkstra(grid, sources, reverse=False):
+    """Run Dijkstra over (position, direction) states and return a flat list of
+    distances, indexed by state_index, with None for unreachable states.
 
-def len_optimal_states(grid, start, end):
-    target, scores = score1(grid, start=start, end=end)
-    edges = grid_edges(grid)
+    sources is an iterable of (pos, dirn) states at distance zero.  With reverse=True the
+    moves are reversed, so the distances are those *to* the sources rather than from them.
+    """
+    nrows, ncols = grid.nrows, grid.ncols
+    open_cells = [c != "#" for c in grid.values()]
+    sign = -1 if reverse else 1
 
-    start_states = {k for k, v in scores.items() if k[0] == start and v == target}
+    dist = [None] * (nrows * ncols * 4)
+    fringe = []
+    for pos, dirn in sources:
+        dist[state_index(grid, pos, dirn)] = 0
+        heapq.heappush(fringe, (0, pos[0], pos[1], dirn))
 
-    optimal_states = start_states.copy()
-    to_process = start_states.copy()
+    while fringe:
+        d, i, j, dirn = heapq.heappop(fringe)
+        index = (i * ncols + j) * 4 + dirn
+        if d > dist[index]:
+            continue
+
+        candidates = [
+            (d + TURN_COST, i, j, (dirn + 1) % 4),
+            (d + TURN_COST, i, j, (dirn - 1) % 4),
+        ]
+        inc0, inc1 = INCS[dirn]
+        ni, nj = i + sign * inc0, j + sign * inc1
+        if 0 <= ni < nrows and 0 <= nj < ncols and open_cells[ni * ncols + nj]:
+            candidates.append((d + STEP_COST, ni, nj, dirn))
+
+        for candidate in candidates:
+            nd, ni, nj, ndirn = candidate
+            nindex = (ni * ncols + nj) * 4 + ndirn
+            if dist[nindex] is None or nd < dist[nindex]:
+                dist[nindex] = nd
+                heapq.heappush(fringe, candidate)
+    return dist
+
+
+@dataclass
+class MazeDistances:
+    """Distances for every (position, direction) state from the start, facing east, and
+    to the end, facing any direction.  best is the lowest possible score.
+    """
+
+    grid: RectGrid
+    best: int
+    d_start: list
+    d_end: list
+
+    @staticmethod
+    def from_grid(grid):
+        start, end = grid_match(grid, "S"), grid_match(grid, "E")
+        d_start = dijkstra(grid, [(start, DIRECTIONS.index(">"))])
+        d_end = dijkstra(grid, [(end, dirn) for dirn in range(4)], reverse=True)
+        best = d_end[state_index(grid, start, DIRECTIONS.index(">"))]
+        return MazeDistances(grid=grid, best=best, d_start=d_start, d_end=d_end)
+
+    def count_optimal_tiles(self):
+        """Count the tiles lying on at least one optimal path.  A state is on an optimal
+        path exactly when its distances from the start and to the end sum to best.
+        """
+        count = 0
+        for cell in range(self.grid.nrows * self.grid.ncols):
+            for index in range(4 * cell, 4 * cell + 4):
+                ds, de = self.d_start[index], self.d_end[index]
+                if ds is not None and de is not None and ds + de == self.best:
+                    count += 1
+                    break
+        return count
 
-    while to_process:
-        processing = to_process.pop()
-        for n_state, cost in neighbor_costs(processing, edges, sign=-1):
-            if (
-                processing in optimal_states
-                and scores[n_state] + cost == scores[processing]
-            ):
-                optimal_states.add(n_state)
-                to_process.add(n_state)
 
-    optimal_pos = {pos for pos, dirn in optimal_states}
-    return len(optimal_pos)
+def run_part1(grids):
+    return [MazeDistances.from_grid(grid).best for grid in grids]
 
 
 def run_part2(grids):
-    return [
-        len_optimal_states(grid, start=grid_match(grid, "S"), end=grid_match(grid, "E"))
-        for grid in grids
-    ]
+    return [MazeDistances.from_grid(grid).count_optimal_tiles() for grid in grids]
+
+
+def run_parts(grids):
+    """Return the answers to both parts, computing the distances once per grid."""
+    distances = [MazeDistances.from_grid(grid) for grid in grids]
+    return [d.best for d in distances], [d.count_optimal_tiles() for d in distances]
 
 
 def run(input_file, part):
@@ -1,4 +1,7 @@
 import itertools
+import random
+from dataclasses import dataclass
+from functools import cache
 
 
 import aoc.helpers as helpers
@@ -92,66 +95,317 @@ def pprint_program(program):
         print(f"{opcode_name(opcode)}: {operand}")
 
 
+def combo_source(operand):
+    """Return the source for a combo operand, in terms of the local registers a, b, c."""
+    if 0 <= operand <= 3:
+        return str(operand)
+    if 4 <= operand <= 6:
+        return "abc"[operand - 4]
+    raise ValueError(f"invalid combo operand {operand}")
+
+
+def instruction_source(opcode, operand):
+    """Return the source lines for a non-jump instruction."""
+    match opcode:
+        case 0:  # adv
+            return [f"a = a >> {combo_source(operand)}"]
+        case 1:  # bxl
+            return [f"b = b ^ {operand}"]
+        case 2:  # bst
+            return [f"b = {combo_source(operand)} & 7"]
+        case 4:  # bxc
+            return ["b = b ^ c"]
+        case 5:  # out
+            return [f"append({combo_source(operand)} & 7)"]
+        case 6:  # bdv
+            return [f"b = a >> {combo_source(operand)}"]
+        case 7:  # cdv
+            return [f"c = a >> {combo_source(operand)}"]
+    raise ValueError(f"invalid opcode {opcode}")
+
+
+def is_simple_loop(program):
+    """True if the only jump in program is a final jnz back to the start, so its body can
+    be compiled as straight-line code.
+    """
+    if not program or len(program) % 2:
+        return False
+    instructions = disassemble(program)
+    return instructions[-1] == (3, 0) and all(
+        opcode != 3 for opcode, _ in instructions[:-1]
+    )
+
+
+def program_source(program):
+    """Generate the source of a function run(a, b, c) returning the output of program.
+    Where run_program fails on an instruction with no operand, so does run.
+    """
+    lines = ["def run(a, b, c):", "    output = []", "    append = output.append"]
+    instructions = disassemble(program) if len(program) % 2 == 0 else None
+    if is_simple_loop(program):
+        lines.append("    while True:")
+        for opcode, operand in instructions[:-1]:
+            lines.extend(
+                "        " + line for line in instruction_source(opcode, operand)
+            )
+        lines.extend(["        if a == 0:", "            break"])
+    elif instructions is not None and all(opcode != 3 for opcode, _ in instructions):
+        for opcode, operand in instructions:
+            lines.extend("    " + line for line in instruction_source(opcode, operand))
+    else:
+        # General case: dispatch on the instruction pointer.  Jumps may target odd
+        # addresses, so there is a block for every address that starts an instruction.
+        lines.extend(["    ip = 0", f"    while 0 <= ip < {len(program)}:"])
+        # the last address has no operand, so run_program fails there
+        lines.append(f"        if ip == {len(program) - 1}:")
+        lines.append("            raise IndexError('missing operand')")
+        for address in range(len(program) - 1):
+            opcode, operand = program[address], program[address + 1]
+            lines.append(f"        elif ip == {address}:")
+            if opcode == 3:
+                lines.append(f"            ip = {operand} if a != 0 else {address + 2}")
+            else:
+                try:
+                    block = instruction_source(opcode, operand)
+                except ValueError as e:
+                    # only an error if the instruction is executed
+                    block = [f"raise ValueError({str(e)!r})"]
+                lines.extend("            " + line for line in block)
+                lines.append(f"            ip = {address + 2}")
+    lines.append("    return output")
+    return "\n".join(lines) + "\n"
+
+
+@cache
+def compile_program(program: tuple):
+    """Compile program to a specialized Python function run(a, b, c).  Functions are cached
+    by program, so each is generated once.
+    """
+    namespace: dict[str, object] = {}
+    exec(compile(program_source(program), f"<program {program}>", "exec"), namespace)
+    return namespace["run"]
+
+
+def run_compiled(*, registers, program):
+    """Fast path equivalent to run_program.  Unlike run_program, registers is not
+    updated.
+    """
+    compiled = compile_program(tuple(program))
+    return compiled(registers["A"], registers["B"], registers["C"])
+
+
+def differential_check(program, a_values, registers=None):
+    """Check run_compiled against the reference interpreter run_program for each A in
+    a_values and return a list of (a, expected, actual) mismatches.
+    """
+    registers = registers or {"A": 0, "B": 0, "C": 0}
+    mismatches = []
+    for a in a_values:
+        expected = run_program(registers=registers | {"A": a}, program=program)
+        actual = run_compiled(registers=registers | {"A": a}, program=program)
+        if expected != actual:
+            mismatches.append((a, expected, actual))
+    return mismatches
+
+
+def random_program(rng, n_instructions):
+    """Return a random terminating program: a loop body built from n_instructions random
+    non-jump steps followed by adv 3 and jnz 0.  Shifts by a register only ever use B
+    straight after a bst, as shifting by a huge register makes the interpreter crawl.
+    """
+    program = []
+    for _ in range(n_instructions):
+        match rng.randrange(5):
+            case 0:  # bxl
+                program.extend([1, rng.randrange(8)])
+            case 1:  # bst
+                program.extend([2, rng.randrange(7)])
+            case 2:  # bxc
+                program.extend([4, rng.randrange(8)])
+            case 3:  # out
+                program.extend([5, rng.randrange(7)])
+            case 4:  # bdv or cdv
+                if rng.randrange(2):
+                    program.extend([2, rng.randrange(7)])
+                    program.extend([rng.choice([6, 7]), 5])
+                else:
+                    program.extend([rng.choice([6, 7]), rng.randrange(4)])
+    return program + [0, 3, 3, 0]
+
+
+def benchmark(program, a_values):
+    """Time the interpreter and the compiled fast path over a_values."""
+    registers = {"A": 0, "B": 0, "C": 0}
+    print(f"interpreter, {len(a_values)} values")
+    with helpers.Timer():
+        for a in a_values:
+            run_program(registers=registers | {"A": a}, program=program)
+    print(f"compiled, {len(a_values)} values")
+    with helpers.Timer():
+        for a in a_values:
+            run_compiled(registers=registers | {"A": a}, program=program)
+
+
+def benchmark_random(n_values=10_000, n_instructions=8, seed=0):
+    """Benchmark a program from random_program over n_values random values of A."""
+    rng = random.Random(seed)
+    program = random_program(rng, n_instructions)
+    pprint_program(program)
+    benchmark(program, [rng.getrandbits(48) for _ in range(n_values)])
+
+
 def run_part1(registers, program):
-    output_buffer = run_program(registers=registers, program=program)
+    output_buffer = run_compiled(registers=registers, program=program)
     return ",".join(map(str, output_buffer))
 
 
-def run_part2(registers, program):
-    # This is specialized to the programs provided.  The full one is harder, and is as
-    # below.
-
-    # bst: 4 : b = a % 8
-    # bxl: 1 : b = b ^ 1
-    # cdv: 5 : c = a >> b
-    # bxl: 5 : b = b ^ 5
-    # bxc: 3 : b = b ^ c
-    # out: 5 : out b % 8
-    # adv: 3 : a = a >> 3
-    # jnz: 0
-
-    len_program = len(program)
-
-    def dfs(root, depth):
-        """Run a depth-first search, offset by root.  The key things here are that the
-        program operates as a loop, and that in each iteration 1) a is shifted right by
-        three digits until it is zero, 2) one character is output 3) the output depends
-        only on the value of a at the start of the iteration.
-
-        We do a depth-first search on A by octal digits. It's easier to do this most
-        significant octal digit first.  That's because the last n outputs depend only on
-        the n most significant octal digits.
-
-        Working from least significant octal digits is also possible but the first n
-        outputs in general depend on higher order octal digits than just the n least
-        significant ones, so the search needs to "look ahead".  It's possible in
-        reasonable time with the example program as only a few extra octal digits are
-        influential in each iteration.
-
-        root contains depth most-significant octal digits.  Except when depth == 0, it
-        will be an octal number with len(program) octal digits.  Its children have zero or
-        more less-significant octal digits set.
-
-        depth is the depth of the search, which is 1 when visiting the most significant
-        octal digit, 2 visiting the next-most, and so on.
-
-        """
-        target_output = program
-        output = run_program(program=program, registers=registers | {"A": root})
-        if output == target_output:
-            return root
+@dataclass
+class RegisterInfo:
+    """What is known about a register during one iteration of a loop program.
+
+    max_value: an upper bound on the value, or None if unbounded
+    low_bits: the number of low bits of A, as at the start of the iteration, that
+      determine the register's lowest three bits
+    fresh: False if the value may carry over from the previous iteration
+    """
 
-        # at a given depth we need the last depth outputs to be correct
-        if output[len_program - depth :] != target_output[len_program - depth :]:
-            return None
-        child_unit = 1 << (3 * (len_program - 1 - depth))
-        children = [root + child_unit * i for i in range(8)]
-        for child in children:
-            if (child_result := dfs(child, depth + 1)) is not None:
-                return child_result
+    max_value: int | None
+    low_bits: int
+    fresh: bool
+
+
+def xor_info(x, y):
+    if x.max_value is None or y.max_value is None:
+        max_value = None
+    else:
+        max_value = (1 << max(x.max_value, y.max_value).bit_length()) - 1
+    return RegisterInfo(max_value, max(x.low_bits, y.low_bits), x.fresh and y.fresh)
+
+
+@dataclass
+class LoopAnalysis:
+    """The shape of a program that loops over A, consuming bits_per_output bits of A and
+    writing one output per iteration, where each output depends only on the lowest
+    window_bits bits of A at the start of its iteration.
+    """
+
+    bits_per_output: int
+    window_bits: int
+
+
+MAX_WINDOW_BITS = 20
+
+
+def analyze_loop(program):
+    """Analyze the disassembled program and return a LoopAnalysis, or raise ValueError
+    if the program does not have the required shape: a single final jnz 0, a single adv
+    by a literal, a single out, and outputs that depend only on a bounded window of the
+    current value of A.
+    """
+    instructions = disassemble(program)
+    if not is_simple_loop(program):
+        raise ValueError("unsupported program: not a single loop ending in jnz 0")
+    body = instructions[:-1]
+    advs = [operand for opcode, operand in body if opcode == 0]
+    if len(advs) != 1 or not 1 <= advs[0] <= 3:
+        raise ValueError("unsupported program: needs a single adv by a literal")
+    if sum(opcode == 5 for opcode, _ in body) != 1:
+        raise ValueError("unsupported program: needs a single out")
+
+    # bits of A shifted out so far in this iteration
+    shifted = 0
+    regs = {name: RegisterInfo(None, 0, fresh=False) for name in "bc"}
+
+    def combo(operand):
+        if 0 <= operand <= 3:
+            return RegisterInfo(operand, 0, fresh=True)
+        if operand == 4:
+            return RegisterInfo(None, shifted + 3, fresh=True)
+        if operand in (5, 6):
+            return regs["abc"[operand - 4]]
+        raise ValueError(f"invalid combo operand {operand}")
+
+    def shift_a(operand):
+        amount = combo(operand)
+        if amount.max_value is None or not amount.fresh:
+            raise ValueError("unsupported program: shift by an unbounded amount")
+        low_bits = max(shifted + amount.max_value + 3, amount.low_bits)
+        return RegisterInfo(None, low_bits, fresh=True)
+
+    for opcode, operand in body:
+        match opcode:
+            case 0:  # adv
+                shifted += operand
+            case 1:  # bxl
+                regs["b"] = xor_info(regs["b"], RegisterInfo(operand, 0, fresh=True))
+            case 2:  # bst
+                x = combo(operand)
+                regs["b"] = RegisterInfo(7, x.low_bits, x.fresh)
+            case 4:  # bxc
+                regs["b"] = xor_info(regs["b"], regs["c"])
+            case 5:  # out
+                output = combo(operand)
+            case 6:  # bdv
+                regs["b"] = shift_a(operand)
+            case 7:  # cdv
+                regs["c"] = shift_a(operand)
+
+    if not output.fresh:
+        raise ValueError(
+            "unsupported program: output depends on the previous iteration"
+        )
+    if output.low_bits > MAX_WINDOW_BITS:
+        raise ValueError(
+            f"unsupported program: output window of {output.low_bits} bits"
+        )
+    return LoopAnalysis(bits_per_output=advs[0], window_bits=max(output.low_bits, 1))
+
+
+def solve_for_output(program, target):
+    """Return the lowest value of A for which program outputs target, or None.
+
+    Each iteration shifts A right by k = bits_per_output bits until it is zero, so an A
+    with n = len(target) digits in base 2**k gives n outputs, and output i depends only
+    on the window of A starting at digit i.  The window covers the digit itself plus a
+    lookahead of the following digits; beyond the top digit, A is zero.
+
+    Search on A by digits, most significant first, trying the lowest digit first so the
+    first solution found is the lowest.  Fixing digit i fixes the whole window for output
+    i, so each step checks one output against a table of outputs by window value.
+    """
+    analysis = analyze_loop(program)
+    k, window_bits = analysis.bits_per_output, analysis.window_bits
+    n = len(target)
+
+    compiled_body = compile_program(tuple(program[:-2]))
+    table = [compiled_body(window, 0, 0)[0] for window in range(1 << window_bits)]
+    window_mask = (1 << window_bits) - 1
+
+    def dfs(root, digit):
+        if digit < 0:
+            return root
+        # the most significant digit must be nonzero to give n outputs
+        for value in range(1 if digit == n - 1 and n > 1 else 0, 1 << k):
+            candidate = root | (value << (k * digit))
+            if table[(candidate >> (k * digit)) & window_mask] == target[digit]:
+                if (result := dfs(candidate, digit - 1)) is not None:
+                    return result
         return None
 
-    return dfs(root=0, depth=0)
+    result = dfs(0, n - 1)
+    if result is not None:
+        registers = {"A": result, "B": 0, "C": 0}
+        assert run_compiled(registers=registers, program=program) == list(target)
+    return result
+
+
+def solve_quine(program):
+    """Return the lowest value of A for which program outputs a copy of itself."""
+    return solve_for_output(program, program)
+
+
+def run_part2(registers, program):
+    return solve_quine(program)
 
 
 def run(input_file, part):
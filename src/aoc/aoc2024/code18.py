@@ -36,34 +36,136 @@ def dijkstra(grid, r0, c0):
     return dict(green)
 
 
-def run_part1(width, height, to_read, xys):
-    grid = RectGrid(["." * width for _ in range(height)])
-
-    for x, y in xys[:to_read]:
-        grid[y, x] = "#"
-
-    dists = dijkstra(grid, 0, 0)
-    print(f"{dists[(height-1, width-1)]=}")
-    return dists[(height - 1, width - 1)]
-
-
-def run_part2(width, height, to_read, xys):
-    def has_path(to_read):
+def blocked_cells(width, height, xys):
+    """Return a flat bytearray, indexed by y * width + x, with 1 for fallen bytes."""
+    blocked = bytearray(width * height)
+    for x, y in xys:
+        blocked[y * width + x] = 1
+    return blocked
+
+
+FROM_START = 1
+FROM_END = 2
+
+
+def bidirectional_bfs(width, height, blocked, start, end):
+    """Return the length of a shortest path from cell start to cell end, or None if there
+    is none.  Cells are flat indices y * width + x and blocked is as from blocked_cells.
+
+    Run a breadth-first search from each end, a whole level at a time, always expanding
+    the smaller frontier.  Visited state lives in one flat bytearray marking which search
+    reached each cell first, and the search stops as soon as the two frontiers meet.
+    """
+    if blocked[start] or blocked[end]:
+        return None
+    if start == end:
+        return 0
+    visited = bytearray(width * height)
+    visited[start] = FROM_START
+    visited[end] = FROM_END
+    frontiers = {FROM_START: [start], FROM_END: [end]}
+    depths = {FROM_START: 0, FROM_END: 0}
+
+    while frontiers[FROM_START] and frontiers[FROM_END]:
+        side = (
+            FROM_START
+            if len(frontiers[FROM_START]) <= len(frontiers[FROM_END])
+            else FROM_END
+        )
+        other = FROM_END if side == FROM_START else FROM_START
+        next_frontier = []
+        for cell in frontiers[side]:
+            y, x = divmod(cell, width)
+            for ncell, ok in (
+                (cell - 1, x > 0),
+                (cell + 1, x < width - 1),
+                (cell - width, y > 0),
+                (cell + width, y < height - 1),
+            ):
+                if not ok or blocked[ncell]:
+                    continue
+                if visited[ncell] == other:
+                    return depths[side] + 1 + depths[other]
+                if not visited[ncell]:
+                    visited[ncell] = side
+                    next_frontier.append(ncell)
+        frontiers[side] = next_frontier
+        depths[side] += 1
+    return None
+
+
+def run_part1(width, height, to_read, xys, mode="bidirectional"):
+    if mode == "dijkstra":
         grid = RectGrid(["." * width for _ in range(height)])
         for x, y in xys[:to_read]:
             grid[y, x] = "#"
         dists = dijkstra(grid, 0, 0)
-        retval = (height - 1, width - 1) in dists
-        print(f"{(to_read,retval)=}")
-        return retval
+        return dists.get((height - 1, width - 1))
+
+    assert mode == "bidirectional"
+    blocked = blocked_cells(width, height, xys[:to_read])
+    return bidirectional_bfs(width, height, blocked, 0, width * height - 1)
+
+
+def find_blocking_byte(width, height, xys):
+    """Return (index, (x, y)) for the first byte whose fall disconnects (0, 0) from the
+    exit, or None if no byte does.
+
+    This works offline and in reverse: mark every byte as fallen, union the free cells,
+    then add the bytes back last first.  The first byte whose removal connects the start
+    to the exit is the blocking byte.  Each step is a handful of near-constant time union
+    find operations.
+    """
+    n_cells = width * height
+    start, end = 0, n_cells - 1
+
+    # a cell is blocked from the first time a byte falls on it
+    first_fall = dict()
+    for index, (x, y) in enumerate(xys):
+        first_fall.setdefault(y * width + x, index)
+    blocked = bytearray(n_cells)
+    for cell in first_fall:
+        blocked[cell] = 1
+
+    sets = helpers.UnionFind(n_cells)
+
+    def free(cell):
+        blocked[cell] = 0
+        y, x = divmod(cell, width)
+        if x > 0 and not blocked[cell - 1]:
+            sets.union(cell, cell - 1)
+        if x < width - 1 and not blocked[cell + 1]:
+            sets.union(cell, cell + 1)
+        if y > 0 and not blocked[cell - width]:
+            sets.union(cell, cell - width)
+        if y < height - 1 and not blocked[cell + width]:
+            sets.union(cell, cell + width)
+
+    for cell in range(n_cells):
+        if not blocked[cell]:
+            free(cell)
+
+    def is_connected():
+        return not blocked[start] and not blocked[end] and sets.connected(start, end)
+
+    if is_connected():
+        return None
+    for index in range(len(xys) - 1, -1, -1):
+        x, y = xys[index]
+        cell = y * width + x
+        if first_fall[cell] != index:
+            continue
+        free(cell)
+        if is_connected():
+            return index, xys[index]
+    return None
 
-    import bisect
 
-    index = bisect.bisect_left(range(len(xys)), True, key=lambda i: not has_path(i))
-
-    print(f"{index=}")
-    print(f"{xys[index-1]=}")
-    return xys[index - 1]
+def run_part2(width, height, to_read, xys):
+    blocking = find_blocking_byte(width, height, xys)
+    assert blocking is not None
+    index, xy = blocking
+    return xy
 
 
 def run(input_file, part):
@@ -1,9 +1,8 @@
-import re
-from functools import cache
-
-
 import aoc.helpers as helpers
 
+# key marking the end of a towel in a trie node
+END = ""
+
 
 def process_sections(sections):
     towels = sections[0][0].split(", ")
@@ -11,30 +10,57 @@ def process_sections(sections):
     return towels, designs
 
 
-def run_part1(towels, designs):
-    pattern = "(" + "|".join(towels) + ")*"
-    return sum(bool(re.fullmatch(pattern, design)) for design in designs)
+def build_trie(towels):
+    """Return a trie of towels as nested dicts keyed by color, where a node contains END
+    if a towel ends there.
+    """
+    trie = dict()
+    for towel in towels:
+        node = trie
+        for color in towel:
+            node = node.setdefault(color, dict())
+        node[END] = True
+    return trie
+
 
+def count_arrangements(trie, design):
+    """Count the ways to make design from towels in trie.
 
-@cache
-def count_matches(towels, design):
-    return sum(
-        1 if design == towel else count_matches(towels, design[len(towel) :])
-        for towel in towels
-        if design.startswith(towel)
-    )
+    ways[i] counts the arrangements of design[i:], so working back from the end of the
+    design each start index needs one walk down the trie.  The memo is local to design.
+    """
+    n = len(design)
+    ways = [0] * (n + 1)
+    ways[n] = 1
+    for i in range(n - 1, -1, -1):
+        node = trie
+        total = 0
+        for j in range(i, n):
+            node = node.get(design[j])
+            if node is None:
+                break
+            if END in node:
+                total += ways[j + 1]
+        ways[i] = total
+    return ways[0]
+
+
+def design_counts(towels, designs):
+    trie = build_trie(towels)
+    return [count_arrangements(trie, design) for design in designs]
+
+
+def run_part1(towels, designs):
+    return sum(count > 0 for count in design_counts(towels, designs))
 
 
 def run_part2(towels, designs):
-    towels = tuple(towels)
-    designs = tuple(designs)
-    return sum(count_matches(towels, design) for design in designs)
+    return sum(design_counts(towels, designs))
 
 
 def run(input_file, part):
     sections = helpers.read_input_sections(input_file)
     processed_input = process_sections(sections)
-    #    pprint(processed_input)
     if part == 1:
         return run_part1(*processed_input)
     else:
@@ -1,5 +1,4 @@
 import argparse
-from collections import defaultdict, Counter
 
 import aoc.helpers as helpers
 from aoc.helpers import PuzzleSize, RectGrid
@@ -25,120 +24,126 @@ def process_sections(sections):
     return RectGrid(sections[0])
 
 
-def dijkstra(grid, r0, c0):
-    HUGE_DIST = 2**20
-    green = defaultdict(lambda: HUGE_DIST)
-    yellow = defaultdict(lambda: HUGE_DIST)
-    yellow[(r0, c0)] = 0
-
-    while yellow:
-        best, best_dist = min(
-            ((cand, dist) for cand, dist in yellow.items()), key=lambda cd: cd[1]
-        )
+def track_path(grid):
+    """Return the positions along the racetrack, in order from S to E.  The track is a
+    single path, so each position's index is its distance from the start.
+    """
+    starts = [pos for pos in grid if grid[pos] == "S"]
+    assert len(starts) == 1
+    ends = [pos for pos in grid if grid[pos] == "E"]
+    assert len(ends) == 1
+    start, end = starts[0], ends[0]
 
-        neighbors = [
-            pos for pos in grid.neighbors(best) if grid[pos] == "." and pos not in green
+    path = [start]
+    prev = None
+    while path[-1] != end:
+        nexts = [
+            pos for pos in grid.neighbors(path[-1]) if grid[pos] != "#" and pos != prev
         ]
+        assert len(nexts) == 1, "the racetrack must be a single path"
+        prev = path[-1]
+        path.append(nexts[0])
+    return path
+
+
+def iter_cheats(path, radius, min_saving):
+    """Yield (d, saving) for each cheat of length d at most radius that saves at least
+    min_saving.
+
+    A cheat from path index i to path index j saves (j - i) - d, where d is the Manhattan
+    distance between the two positions, so only j >= i + min_saving can qualify.  Each
+    step along the path changes d by at most one, so when d > radius the next
+    d - radius indices can be skipped.
+    """
+    rows = [pos[0] for pos in path]
+    cols = [pos[1] for pos in path]
+    n = len(path)
+    for i in range(n - min_saving):
+        r, c = rows[i], cols[i]
+        j = i + min_saving
+        while j < n:
+            d = abs(rows[j] - r) + abs(cols[j] - c)
+            if d > radius:
+                j += d - radius
+                continue
+            if (saving := j - i - d) >= min_saving:
+                yield d, saving
+            j += 1
+
+
+def count_cheats(path, radius, threshold):
+    """Count the cheats of length at most radius that save at least threshold."""
+    return sum(1 for _ in iter_cheats(path, radius, threshold))
+
+
+class CheatHistogram:
+    """Counts of cheats by length and saving, for all cheats of length up to max_radius
+    that save at least min_saving, built in a single pass over the path.
+
+    counts[d][s] is the number of cheats of length exactly d saving exactly s.  A cheat of
+    length d is allowed for any radius >= d, so the number of cheats allowed by radius r
+    saving at least t is a sum over d <= r and s >= t, which count answers in O(1) from
+    cumulative sums.
+    """
+
+    def __init__(self, path, max_radius, min_saving=1):
+        assert max_radius >= 1 and min_saving >= 1
+        self.max_radius = max_radius
+        self.min_saving = min_saving
+        n = len(path)
+        self.counts = [[0] * (n + 1) for _ in range(max_radius + 1)]
+        for d, saving in iter_cheats(path, max_radius, min_saving):
+            self.counts[d][saving] += 1
+
+        # cumulative[d][s]: cheats of length <= d saving >= s
+        self.cumulative = []
+        previous = [0] * (n + 2)
+        for d in range(max_radius + 1):
+            row = previous.copy()
+            at_least = 0
+            for saving in range(n, -1, -1):
+                at_least += self.counts[d][saving]
+                row[saving] += at_least
+            self.cumulative.append(row)
+            previous = row
+
+    def histogram(self, radius):
+        """Return a dict of saving -> number of cheats allowed by radius."""
+        assert radius <= self.max_radius
+        totals = dict()
+        for d in range(radius + 1):
+            for saving, count in enumerate(self.counts[d]):
+                if count:
+                    totals[saving] = totals.get(saving, 0) + count
+        return dict(sorted(totals.items()))
+
+    def count(self, radius, threshold):
+        """Count the cheats allowed by radius that save at least threshold."""
+        assert radius <= self.max_radius and threshold >= self.min_saving
+        row = self.cumulative[radius]
+        return row[min(threshold, len(row) - 1)]
+
+
+def run_part1(grid, radius=2, threshold=100):
+    histogram = CheatHistogram(
+        track_path(grid), max_radius=radius, min_saving=threshold
+    )
+    return histogram.count(radius, threshold)
 
-        for n in neighbors:
-            yellow[n] = min(yellow[n], best_dist + 1)
 
-        # print(best, best_dist)
-        # print("neighbors", neighbors)
-        assert best not in green and best in yellow
-        green[best] = yellow[best]
-        del yellow[best]
-        assert best not in yellow and best in green
-    count_open = sum(1 for pos in grid if grid[pos] != "#")
-    assert count_open == len(green)
-    return dict(green)
+def run_part2(grid, radius=20, threshold=100):
+    histogram = CheatHistogram(
+        track_path(grid), max_radius=radius, min_saving=threshold
+    )
+    return histogram.count(radius, threshold)
 
 
-def run_part1(grid):
-    starts = [pos for pos in grid if grid[pos] == "S"]
-    assert len(starts) == 1
-    ends = [pos for pos in grid if grid[pos] == "E"]
-    assert len(ends) == 1
-    start, end = starts[0], ends[0]
-    grid[start] = "."
-    grid[end] = "."
-
-    d_start = dijkstra(grid, start[0], start[1])
-    d_end = dijkstra(grid, end[0], end[1])
-    assert d_start[start] == 0
-    assert d_end[end] == 0
-    assert d_end[start] == d_start[end]
-    for pos in d_start:
-        assert d_start[pos] + d_end[pos] == d_start[end]
-    baseline = d_start[end]
-    print("baseline", baseline)
-
-    cheats = []
-    for cheat1 in grid:
-        if grid[cheat1] == ".":
-            # wlog there's at least one blocked square being used
-            continue
-        for cheat2 in grid.neighbors(cheat1):
-            # ok if cheat2 is clear
-            for n1 in grid.neighbors(cheat1):
-                if n1 != cheat2 and n1 in d_start:
-                    if cheat2 in d_end:
-                        cheat_dist = d_start[n1] + 2 + d_end[cheat2]
-                        if cheat_dist < baseline:
-                            cheats.append((n1, cheat1, cheat2, baseline - cheat_dist))
-    counts = Counter(cheat[3] for cheat in cheats)
-    saves_100 = sum(count for savings, count in counts.items() if savings >= 100)
-    return saves_100
-
-
-def run_part2(grid):
-    starts = [pos for pos in grid if grid[pos] == "S"]
-    assert len(starts) == 1
-    ends = [pos for pos in grid if grid[pos] == "E"]
-    assert len(ends) == 1
-    start, end = starts[0], ends[0]
-    grid[start] = "."
-    grid[end] = "."
-
-    d_start = dijkstra(grid, start[0], start[1])
-    d_end = dijkstra(grid, end[0], end[1])
-    assert d_start[start] == 0
-    assert d_end[end] == 0
-    assert d_end[start] == d_start[end]
-    for pos in d_start:
-        assert d_start[pos] + d_end[pos] == d_start[end]
-    baseline = d_start[end]
-    print("baseline", baseline)
-
-    cheats = []
-    radius = 20
-
-    threshold = 50
-    for cheat0 in grid:
-        if grid[cheat0] != "." or cheat0 not in d_start:
-            # start the cheat at a reachable open square
-            continue
-        for c1r in range(
-            max(0, cheat0[0] - radius), min(grid.nrows, cheat0[0] + radius + 1)
-        ):
-            radius2 = radius - abs(c1r - cheat0[0])
-            for c1c in range(
-                max(0, cheat0[1] - radius2), min(grid.ncols, cheat0[1] + radius2 + 1)
-            ):
-                cheat1 = (c1r, c1c)
-                if grid[cheat1] != "." or cheat1 not in d_end:
-                    continue
-                cheat_dist = (
-                    d_start[cheat0]
-                    + abs(cheat0[0] - cheat1[0])
-                    + abs(cheat0[1] - cheat1[1])
-                    + d_end[cheat1]
-                )
-                if baseline - cheat_dist >= threshold:
-                    cheats.append((cheat0, cheat1, baseline - cheat_dist))
-    counts = Counter(cheat[2] for cheat in cheats)
-    saves_100 = sum(count for savings, count in counts.items() if savings >= 100)
-    return saves_100
+def run_parts(grid, radii=(2, 20), threshold=100):
+    """Return the answers to both parts from a single histogram of the path."""
+    histogram = CheatHistogram(
+        track_path(grid), max_radius=max(radii), min_saving=threshold
+    )
+    return [histogram.count(radius, threshold) for radius in radii]
 
 
 def run(input_file, part):
@@ -1,6 +1,5 @@
 import argparse
 import itertools
-from functools import cache
 from pprint import pprint
 
 import aoc.helpers as helpers
@@ -27,142 +26,125 @@ def process_sections(sections):
     return sections[0]
 
 
-NUMERIC_KEYPAD = dict(
-    [
-        ("7", (0, 0)),
-        ("8", (0, 1)),
-        ("9", (0, 2)),
-        ("4", (1, 0)),
-        ("5", (1, 1)),
-        ("6", (1, 2)),
-        ("1", (2, 0)),
-        ("2", (2, 1)),
-        ("3", (2, 2)),
-        ("0", (3, 1)),
-        ("A", (3, 2)),
-    ]
-)
-
-
-def nkft2dkseqs(nkft):
-    """Convert a from-to pair on the numeric keypad to candidate sequences of preses on
-    the controlling directional keypad.  Each sequence consists of a (possibly empty)
-    sequence of moves then an 'A' to press the 'to' key.
-    """
-    f, t = nkft
-    frc = NUMERIC_KEYPAD[f]
-    trc = NUMERIC_KEYPAD[t]
-    vm = trc[0] - frc[0]
-    if vm == 0:
-        vseq = ""
-    if vm > 0:
-        vseq = "v" * vm
-    if vm < 0:
-        vseq = "^" * abs(vm)
-    hm = trc[1] - frc[1]
-    if hm == 0:
-        hseq = ""
-    if hm > 0:
-        hseq = ">" * hm
-    if hm < 0:
-        hseq = "<" * abs(hm)
-
-    # Assume it always makes sense to group together same-direction moves, so there are
-    # either one or two candidate sequences to return
-    if frc[1] == 0 and trc[0] == 3:
-        return [hseq + vseq + "A"]
-    if frc[0] == 3 and trc[1] == 0:
-        return [vseq + hseq + "A"]
-    if not vseq or not hseq:
-        return [vseq + hseq + "A"]
-
-    return [
-        vseq + hseq + "A",
-        hseq + vseq + "A",
-    ]
-
-
-def nkseq2dkseqs(nkseq):
-    """Convert a sequence of buttons on the numeric keypad to candidate sequences of
-    button presses on the controlling directional keypad.  The sequences are taken by
-    concatenating directional sequences for each pair of successive buttons in nkseq.
+MOVES = {"^": (-1, 0), "v": (1, 0), "<": (0, -1), ">": (0, 1)}
+
+
+class Keypad:
+    """A keypad built from a layout string, one line per row, with a space for a gap.
+    Rows may differ in length, and positions off the layout count as gaps.
+
+    moves[f, t] holds the candidate sequences of presses on a controlling directional
+    keypad that move from key f to key t and press it.  Each consists of a (possibly
+    empty) sequence of moves then an 'A'.  Sequences that pass over a gap are excluded.
+    move_pairs[f, t] holds the same sequences as from-to pairs of controlling keys,
+    starting from 'A', ready for costing.  Both are computed once, on construction.
     """
-    dkftseqs = [nkft2dkseqs(nkft) for nkft in helpers.subsequences(nkseq, 2)]
-    dkseqs = ["".join(s) for s in list(itertools.product(*dkftseqs))]
-    return dkseqs
 
+    def __init__(self, layout: str):
+        self.layout = layout
+        self.positions = dict()
+        for i, row in enumerate(layout.splitlines()):
+            for j, key in enumerate(row):
+                if key != " ":
+                    self.positions[key] = (i, j)
+        self.cells = set(self.positions.values())
+        self.keys = list(self.positions)
+        self.moves = {
+            (f, t): self._candidate_moves(f, t) for f in self.keys for t in self.keys
+        }
+        self.move_pairs = {
+            ft: [tuple(helpers.subsequences("A" + seq, 2)) for seq in seqs]
+            for ft, seqs in self.moves.items()
+        }
+
+    def __repr__(self):
+        return f"Keypad({self.layout!r})"
+
+    def _avoids_gap(self, start, seq):
+        i, j = start
+        for move in seq:
+            i, j = i + MOVES[move][0], j + MOVES[move][1]
+            if (i, j) not in self.cells:
+                return False
+        return True
+
+    def _candidate_moves(self, f, t):
+        frc, trc = self.positions[f], self.positions[t]
+        vm, hm = trc[0] - frc[0], trc[1] - frc[1]
+        vseq = ("v" if vm > 0 else "^") * abs(vm)
+        hseq = (">" if hm > 0 else "<") * abs(hm)
+
+        # Assume it always makes sense to group together same-direction moves, so there
+        # are either one or two candidate sequences to return
+        candidates = []
+        for seq in dict.fromkeys([vseq + hseq, hseq + vseq]):
+            if self._avoids_gap(frc, seq):
+                candidates.append(seq + "A")
+        assert candidates
+        return candidates
+
+
+#     +---+---+---+
+#     | 7 | 8 | 9 |
+#     +---+---+---+
+#     | 4 | 5 | 6 |
+#     +---+---+---+
+#     | 1 | 2 | 3 |
+#     +---+---+---+
+#         | 0 | A |
+#         +---+---+
+NUMERIC_KEYPAD = Keypad("789\n456\n123\n 0A")
 
 #     +---+---+
 #     | ^ | A |
 # +---+---+---+
 # | < | v | > |
 # +---+---+---+
-DIRECTIONAL_KEYPAD = dict(
-    [
-        ("^", (0, 1)),
-        ("A", (0, 2)),
-        ("<", (1, 0)),
-        ("v", (1, 1)),
-        (">", (1, 2)),
-    ]
-)
-
-
-def dkft2nextdkseqs(dkft):
-    """Convert a from-to pair on a directional keypad to candidate sequences of presses on
-    a controlling directional keypad at the next level.  Each sequence consists of a
-    (possibly empty) sequence of moves then an 'A' to press the 'to' key.
+DIRECTIONAL_KEYPAD = Keypad(" ^A\n<v>")
+
+
+def next_cost_matrix(costs, keypad):
+    """Given costs[a][b], the presses needed at the human's keypad to move from key a to
+    key b on the controlling keypad and press b, return the same matrix for keypad.
+
+    Every sequence on the controlling keypad starts and ends on 'A', so the cost of a
+    sequence is the sum of costs of its from-to pairs starting from 'A'.
     """
+    matrix = {f: dict() for f in keypad.keys}
+    for (f, t), candidates in keypad.move_pairs.items():
+        matrix[f][t] = min(sum(costs[a][b] for a, b in pairs) for pairs in candidates)
+    return matrix
 
-    f, t = dkft
-    frc = DIRECTIONAL_KEYPAD[f]
-    trc = DIRECTIONAL_KEYPAD[t]
-    vm = trc[0] - frc[0]
-    if vm == 0:
-        vseq = ""
-    if vm > 0:
-        vseq = "v" * vm
-    if vm < 0:
-        vseq = "^" * abs(vm)
-    hm = trc[1] - frc[1]
-    if hm == 0:
-        hseq = ""
-    if hm > 0:
-        hseq = ">" * hm
-    if hm < 0:
-        hseq = "<" * abs(hm)
-
-    # Same assumptions as for the numeric keypad
-    if frc[1] == 0 and trc[0] == 0:
-        return [hseq + vseq + "A"]
-    if frc[0] == 0 and trc[1] == 0:
-        return [vseq + hseq + "A"]
-    if not vseq or not hseq:
-        return [vseq + hseq + "A"]
-    return [
-        vseq + hseq + "A",
-        hseq + vseq + "A",
-    ]
-
-
-@cache
-def dkft_cost(dkft, level):
-    if level == 1:
-        return 1
-    return min(dkseq_cost(nextdkseq, level - 1) for nextdkseq in dkft2nextdkseqs(dkft))
-
-
-@cache
-def dkseq_cost(dkseq, level):
-    return sum(dkft_cost(dkft, level) for dkft in helpers.subsequences("A" + dkseq, 2))
+
+def cost_matrix(keypads):
+    """Return the cost matrix for the last of keypads, an iterable ordered from the
+    keypad the human presses outwards, with each keypad controlling the next.  Only the
+    previous keypad's matrix is kept, so keypads may be a long iterator.
+    """
+    keypads = iter(keypads)
+    first = next(keypads)
+    costs = {f: {t: 1 for t in first.keys} for f in first.keys}
+    for keypad in keypads:
+        costs = next_cost_matrix(costs, keypad)
+    return costs
+
+
+def sequence_cost(seq, costs):
+    """Return the presses needed at the human's keypad to type seq, starting from 'A', on
+    a keypad with cost matrix costs.
+    """
+    return sum(costs[a][b] for a, b in helpers.subsequences("A" + seq, 2))
 
 
 def run_cases(cases, n_levels):
-    return sum(
-        int(case[:-1])
-        * min(dkseq_cost(dkseq, n_levels - 1) for dkseq in nkseq2dkseqs("A" + case))
-        for case in cases
+    """n_levels counts the keypads, from the human's directional keypad to the numeric
+    keypad.
+    """
+    keypads = itertools.chain(
+        itertools.repeat(DIRECTIONAL_KEYPAD, n_levels - 1), [NUMERIC_KEYPAD]
     )
+    costs = cost_matrix(keypads)
+    return sum(int(case[:-1]) * sequence_cost(case, costs) for case in cases)
 
 
 def run_part1(cases):
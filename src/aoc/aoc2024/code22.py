@@ -1,5 +1,9 @@
 import argparse
-from collections import defaultdict
+import concurrent.futures
+import itertools
+import operator
+import sys
+from array import array
 
 import aoc.helpers as helpers
 from aoc.helpers import PuzzleSize
@@ -25,19 +29,13 @@ def process_sections(sections):
     return list(map(int, sections[0]))
 
 
-def mix(sn, n):
-    return sn ^ n
+PRUNE_MASK = 2**24 - 1
 
 
-def prune(sn):
-    return sn % 2**24
-
-
-def next_sn(osn):
-    sn = osn
-    sn = prune(mix(sn, sn * 64))
-    sn = prune(mix(sn, sn // 32))
-    sn = prune(mix(sn, sn * 2048))
+def next_sn(sn):
+    sn ^= (sn << 6) & PRUNE_MASK
+    sn ^= sn >> 5
+    sn ^= (sn & (PRUNE_MASK >> 11)) << 11
     return sn
 
 
@@ -50,26 +48,135 @@ def advance_sn(sn, n):
 assert next_sn(123) == 15887950
 
 
+# Batched generation packs the secret numbers of all buyers into one Python int, in
+# lanes with the same layout as an array of LANE_TYPECODE, and steps every lane at once
+# with whole-int shifts, XORs and masks.  Secret numbers have 24 bits, and a lane needs
+# room for the 6 bits shifted up by the first step, so that masking after each shift
+# stops bits leaking between lanes.
+LANE_TYPECODE = "I"
+LANE_BYTES = array(LANE_TYPECODE).itemsize
+assert 8 * LANE_BYTES >= 24 + 6
+
+
+def lane_mask(n_lanes, mask):
+    return int.from_bytes(
+        mask.to_bytes(LANE_BYTES, sys.byteorder) * n_lanes, sys.byteorder
+    )
+
+
+def pack_sns(sns):
+    return int.from_bytes(array(LANE_TYPECODE, sns).tobytes(), sys.byteorder)
+
+
+def unpack_sns(packed, n_lanes):
+    return array(LANE_TYPECODE, packed.to_bytes(LANE_BYTES * n_lanes, sys.byteorder))
+
+
+def generate_sns(init_sns, n):
+    """Yield array(LANE_TYPECODE) rows with the secret numbers of all buyers, starting with
+    init_sns and then after each of n steps.
+    """
+    n_lanes = len(init_sns)
+    mask24 = lane_mask(n_lanes, PRUNE_MASK)
+    mask13 = lane_mask(n_lanes, PRUNE_MASK >> 11)
+    packed = pack_sns(init_sns)
+    yield unpack_sns(packed, n_lanes)
+    for _ in range(n):
+        packed ^= (packed << 6) & mask24
+        packed ^= (packed >> 5) & mask24
+        packed ^= (packed & mask13) << 11
+        yield unpack_sns(packed, n_lanes)
+
+
+def advance_sns(init_sns, n):
+    """Return an array(LANE_TYPECODE) of the secret numbers of all buyers after n steps."""
+    for sns in generate_sns(init_sns, n):
+        pass
+    return sns
+
+
+DELTA_OFFSET = 9
+
+
+def price_and_delta_matrices(init_sns, n):
+    """Return (prices, deltas) as lists of bytes, one per buyer.  prices[b][t] is buyer
+    b's price after t steps, for t in 0..n, and deltas[b][t] is prices[b][t + 1] -
+    prices[b][t] + DELTA_OFFSET, so it lies in 0..18.
+
+    Each step's prices are packed into byte lanes, so the deltas for all buyers are one
+    big-int subtraction: adding DELTA_OFFSET to every lane first means no lane borrows.
+    """
+    n_lanes = len(init_sns)
+    offsets = int.from_bytes(bytes([DELTA_OFFSET]) * n_lanes, sys.byteorder)
+    price_rows = []
+    delta_rows = []
+    previous = None
+    for sns in generate_sns(init_sns, n):
+        price_row = bytes(map(operator.mod, sns, itertools.repeat(10)))
+        packed = int.from_bytes(price_row, sys.byteorder)
+        if previous is not None:
+            delta = packed + offsets - previous
+            delta_rows.append(delta.to_bytes(n_lanes, sys.byteorder))
+        price_rows.append(price_row)
+        previous = packed
+    prices = list(map(bytes, zip(*price_rows)))
+    deltas = list(map(bytes, zip(*delta_rows)))
+    return prices, deltas
+
+
 def run_part1(init_sns):
-    return sum(advance_sn(sn, 2000) for sn in init_sns)
-
-
-def run_part2(init_sns):
-    total_value = defaultdict(int)
-    for sn in init_sns:
-        run = []
-        run.append(sn)
-        for _ in range(2000):
-            sn = next_sn(sn)
-            run.append(sn)
-        local_price_info = dict()
-        for i in range(1, 1998):
-            seq = tuple(run[i + j] % 10 - run[i + j - 1] % 10 for j in range(4))
-            value = run[i + 3] % 10
-            if seq not in local_price_info:
-                local_price_info[seq] = value
-                total_value[seq] += value
-    return max(total_value.values())
+    return sum(advance_sns(init_sns, 2000))
+
+
+# A window of four deltas, each in 0..18 after DELTA_OFFSET, encoded in base 19
+DELTA_BASE = 2 * DELTA_OFFSET + 1
+WINDOW = 4
+N_WINDOWS = DELTA_BASE**WINDOW
+
+
+def window_totals(init_sns, n=2000):
+    """Return an array("q") indexed by encoded delta window, holding the total price
+    over buyers when selling at the first occurrence of that window.
+
+    The window code is updated in place as a rolling base-19 integer.  A stamp table
+    records which buyer last saw each window, so nothing is allocated in the inner
+    loop and the stamps never need clearing.  Totals from disjoint sets of buyers can be
+    combined with merge_totals.
+    """
+    prices, deltas = price_and_delta_matrices(init_sns, n)
+    # lists index faster than arrays in the inner loop
+    totals = [0] * N_WINDOWS
+    stamps = [-1] * N_WINDOWS
+    for buyer, (buyer_prices, buyer_deltas) in enumerate(zip(prices, deltas)):
+        code = 0
+        for i, delta in enumerate(buyer_deltas):
+            code = (code * DELTA_BASE + delta) % N_WINDOWS
+            if i >= WINDOW - 1 and stamps[code] != buyer:
+                stamps[code] = buyer
+                totals[code] += buyer_prices[i + 1]
+    return array("q", totals)
+
+
+def merge_totals(partials):
+    """Sum window totals computed for disjoint sets of buyers."""
+    partials = iter(partials)
+    totals = array("q", next(partials))
+    for partial in partials:
+        for code, value in enumerate(partial):
+            if value:
+                totals[code] += value
+    return totals
+
+
+def run_part2(init_sns, n_workers=1):
+    if n_workers == 1:
+        totals = window_totals(init_sns)
+    else:
+        chunk_size = -(-len(init_sns) // n_workers)
+        chunks = list(itertools.batched(init_sns, chunk_size))
+        with concurrent.futures.ProcessPoolExecutor(n_workers) as executor:
+            totals = merge_totals(executor.map(window_totals, chunks))
+    return max(totals)
 
 
 def run(input_file, part):
@@ -16,36 +16,100 @@ def create_neighbors(edges):
     return neighbors
 
 
-def expand(tuples, neighbors):
-    new_tuples = set()
-    for tup in tuples:
-        neighbor_sets = [neighbors[n] for n in tup]
-        common_neighbors = set.intersection(*neighbor_sets)
-        for n in common_neighbors:
-            new_tuples.add(tuple(sorted((*tup, n))))
-    return new_tuples
+def degree_ranks(neighbors):
+    """Rank nodes by (degree, name), so that orienting each edge from lower to higher
+    rank gives every node at most O(sqrt(edges)) out-neighbors.
+    """
+    order = sorted(neighbors, key=lambda node: (len(neighbors[node]), node))
+    return {node: rank for rank, node in enumerate(order)}
+
+
+def triangles(neighbors, predicate=None):
+    """Yield each triangle in the graph exactly once, as a tuple of nodes.
+
+    Without a predicate, edges are oriented by degree rank and each triangle is found
+    from its lowest ranked node.  With a predicate, only triangles with at least one
+    matching node are generated: each is found from its lowest ranked matching node, by
+    looking for edges among that node's neighbors.
+    """
+    ranks = degree_ranks(neighbors)
+    if predicate is None:
+        out = {u: {v for v in vs if ranks[v] > ranks[u]} for u, vs in neighbors.items()}
+        for u, u_out in out.items():
+            for v in u_out:
+                for w in u_out & out[v]:
+                    yield u, v, w
+        return
+
+    matching = sorted((node for node in neighbors if predicate(node)), key=ranks.get)
+    for m in matching:
+        # skip neighbors matching with a lower rank, which have already been done
+        candidates = {
+            v for v in neighbors[m] if not (predicate(v) and ranks[v] < ranks[m])
+        }
+        for v in candidates:
+            for w in neighbors[v] & candidates:
+                if ranks[w] > ranks[v]:
+                    yield m, v, w
 
 
 def run_part1(edges):
     neighbors = create_neighbors(edges)
-    triples = expand(edges, neighbors)
-    triples = set(
-        triple for triple in triples if any(item.startswith("t") for item in triple)
-    )
-    return len(triples)
+    return sum(1 for _ in triangles(neighbors, lambda node: node.startswith("t")))
 
 
-def run_part2(edges):
+def bitset_adjacency(edges):
+    """Map nodes to bit indices in sorted order and return (nodes, adjacency), where
+    adjacency[i] is an int with bit j set when nodes i and j are neighbors.
+    """
     neighbors = create_neighbors(edges)
-    tuples = edges
-    while True:
-        new_tuples = expand(tuples, neighbors)
-        print(f"{len(new_tuples)=}")
-        if not new_tuples:
-            break
-        tuples = new_tuples
-    assert len(tuples) == 1
-    return ",".join(tuples.pop())
+    nodes = sorted(neighbors)
+    index = {node: i for i, node in enumerate(nodes)}
+    adjacency = [0] * len(nodes)
+    for node, node_neighbors in neighbors.items():
+        for neighbor in node_neighbors:
+            adjacency[index[node]] |= 1 << index[neighbor]
+    return nodes, adjacency
+
+
+def iter_bits(bits):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def maximum_clique(adjacency):
+    """Return a maximum clique, as a bitset, using Bron-Kerbosch with Tomita pivoting.
+
+    r is the clique being grown, p the candidates that extend it and x the nodes already
+    tried.  Branches that cannot beat the best clique so far are pruned.  Memory is linear
+    in the graph size: the recursion is at most one clique deep.
+    """
+    best = 0
+
+    def expand(r, p, x):
+        nonlocal best
+        if not p:
+            if not x and r.bit_count() > best.bit_count():
+                best = r
+            return
+        if r.bit_count() + p.bit_count() <= best.bit_count():
+            return
+        # pivot on the node with the most neighbors among the candidates
+        pivot = max(iter_bits(p | x), key=lambda u: (p & adjacency[u]).bit_count())
+        for v in iter_bits(p & ~adjacency[pivot]):
+            expand(r | (1 << v), p & adjacency[v], x & adjacency[v])
+            p &= ~(1 << v)
+            x |= 1 << v
+
+    expand(0, (1 << len(adjacency)) - 1, 0)
+    return best
+
+
+def run_part2(edges):
+    nodes, adjacency = bitset_adjacency(edges)
+    return ",".join(nodes[i] for i in iter_bits(maximum_clique(adjacency)))
 
 
 def run(input_file, part):
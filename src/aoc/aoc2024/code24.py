@@ -1,4 +1,10 @@
+import concurrent.futures
+import itertools
+import math
+import operator
+import random
 import re
+import time
 from collections import defaultdict
 from dataclasses import dataclass
 import dataclasses
@@ -56,31 +62,86 @@ def process_sections(sections):
     return set(wires)
 
 
-def run_part1(wires):
-    def ev(wire):
-        return env[wire](env)
+OPERATORS = {And: operator.and_, Or: operator.or_, Xor: operator.xor}
+
+
+def compile_wires(wires):
+    """Return the gates of wires as a topologically ordered list of instructions
+    (op, out, a, b), where op is a function of the two input values.  Raise ValueError if
+    the gates form a cycle.
+
+    Uses Kahn's algorithm, so deep circuits don't hit the recursion limit.
+    """
+    gates = {wire.out: wire for wire in wires if isinstance(wire, BinOp)}
+    n_pending = {out: 0 for out in gates}
+    children = defaultdict(list)
+    for out, gate in gates.items():
+        for parent in (gate.a, gate.b):
+            if parent in gates:
+                n_pending[out] += 1
+                children[parent].append(out)
+
+    ready = [out for out, n in n_pending.items() if n == 0]
+    instructions = []
+    while ready:
+        out = ready.pop()
+        gate = gates[out]
+        instructions.append((OPERATORS[type(gate)], out, gate.a, gate.b))
+        for child in children[out]:
+            n_pending[child] -= 1
+            if n_pending[child] == 0:
+                ready.append(child)
+    if len(instructions) != len(gates):
+        raise ValueError("the gates contain a cycle")
+    return instructions
+
+
+def evaluate(instructions, inputs):
+    """Evaluate compiled instructions, returning a dict of wire values.  Each value is a
+    Python int holding many independent test vectors as bits, so one pass evaluates all
+    of them.
+    """
+    values = dict(inputs)
+    for op, out, a, b in instructions:
+        values[out] = op(values[a], values[b])
+    return values
 
-    env = dict()
-    for wire in wires:
-        out = wire.out
-        match wire:
-            case Constant(c=c):
-                env[out] = lambda env, c=c: c
-            case And(a=a, b=b):
-                env[out] = lambda env, a=a, b=b: ev(a) & ev(b)
-            case Or(a=a, b=b):
-                env[out] = lambda env, a=a, b=b: ev(a) | ev(b)
-            case Xor(a=a, b=b):
-                env[out] = lambda env, a=a, b=b: ev(a) ^ ev(b)
-    return sum(ev(k) << int(k[1:]) for k in env if k.startswith("z"))
 
+def run_part1(wires):
+    inputs = {wire.out: wire.c for wire in wires if isinstance(wire, Constant)}
+    values = evaluate(compile_wires(wires), inputs)
+    return sum(values[k] << int(k[1:]) for k in values if k.startswith("z"))
 
-def match_ab(wires: set, ab: set):
-    return set(w for w in wires if isinstance(w, BinOp) and set((w.a, w.b)) == ab)
 
+def simulate_adder(wires, n_vectors=4096, seed=0):
+    """Check by randomized simulation that wires add x and y into z, and return the set
+    of z labels that are wrong for at least one of n_vectors random inputs.
 
-def match_out(wires: set, out: str):
-    return set(w for w in wires if w.out == out)
+    The expected sum is computed bit-parallel too, with a ripple-carry adder over the
+    same packed test vectors.
+    """
+    rng = random.Random(seed)
+    instructions = compile_wires(wires)
+    len_xy = sum(1 for wire in wires if wire.out.startswith("x"))
+    inputs = dict()
+    for i in range(len_xy):
+        for c in "xy":
+            inputs[label(c, i)] = rng.getrandbits(n_vectors)
+    values = evaluate(instructions, inputs)
+
+    wrong = set()
+    carry = 0
+    for i in range(len_xy + 1):
+        z = label("z", i)
+        if i < len_xy:
+            x, y = inputs[label("x", i)], inputs[label("y", i)]
+            expected = x ^ y ^ carry
+            carry = (x & y) | (carry & (x ^ y))
+        else:
+            expected = carry
+        if values.get(z) != expected:
+            wrong.add(z)
+    return wrong
 
 
 def label(p, i):
@@ -161,33 +222,71 @@ class WireNameError(TrackedException):
         return [self.expected, self.actual]
 
 
-def find_child(wires: set, ab: set, cls: type):
-    """Return either a wire whose inputs, as a set, equal ab and which is an instance of
-    cls or return None.
+class GateIndex:
+    """Gates indexed by (type, frozenset(inputs)) and by output, plus the set of outputs
+    consuming each wire.  Swapping two outputs edits the index in O(1).
     """
-    matches = [w for w in wires if isinstance(w, cls) and set((w.a, w.b)) == ab]
-
-    if len(matches) != 1:
-        return None
-    return matches[0]
 
+    def __init__(self, wires):
+        self.by_out = {wire.out: wire for wire in wires if isinstance(wire, BinOp)}
+        self.by_inputs = defaultdict(set)
+        self.children = defaultdict(set)
+        for out, gate in self.by_out.items():
+            self.by_inputs[type(gate), frozenset((gate.a, gate.b))].add(out)
+            for parent in (gate.a, gate.b):
+                self.children[parent].add(out)
+
+    def find_child(self, ab: set, cls: type):
+        """Return the output of the only gate of type cls whose inputs, as a set, equal ab,
+        or None if there isn't exactly one.
+        """
+        outs = self.by_inputs.get((cls, frozenset(ab)), ())
+        if len(outs) != 1:
+            return None
+        return next(iter(outs))
+
+    def swap(self, s0, s1):
+        """Swap the outputs of the gates driving s0 and s1.  Swapping again undoes it."""
+        g0, g1 = self.by_out[s0], self.by_out[s1]
+        for gate, old in ((g0, s0), (g1, s1)):
+            self.by_inputs[type(gate), frozenset((gate.a, gate.b))].discard(old)
+            for parent in (gate.a, gate.b):
+                self.children[parent].discard(old)
+        for gate, new in ((g0, s1), (g1, s0)):
+            self.by_inputs[type(gate), frozenset((gate.a, gate.b))].add(new)
+            for parent in (gate.a, gate.b):
+                self.children[parent].add(new)
+        self.by_out[s0], self.by_out[s1] = g1, g0
+
+
+class AdderVerifier:
+    """Structural check that the gates form a ripple-carry adder, rank by rank.
+
+    The result for each rank (bit position) is cached with the carry it was given and
+    the labels it looked at.  After a swap only ranks that looked at a swapped label, or
+    whose incoming carry changed, are checked again.
+    """
 
-def calc_defects(wires, swaps):
-    wires = apply_swaps(wires, swaps)
-    len_xy = int(max(wire.out for wire in wires)[1:])
-    for i in range(len_xy):
-        assert len(match_out(wires, label("z", i))) == 1
-        assert len(match_ab(wires, xy_labels(i))) == 2
-    # parents: outputs->inputs
-    parents = {wire.out: wire_parents(wire) for wire in wires}
-    # children: inputs->outputs
-    children = defaultdict(set)
-
-    defects = set()
-    for out, parents in parents.items():
-        for p in parents:
-            children[p].add(out)
-    for i in range(len_xy):
+    def __init__(self, wires):
+        self.index = GateIndex(wires)
+        self.len_xy = max(int(w.out[1:]) for w in wires if w.out.startswith("z"))
+        for i in range(self.len_xy):
+            assert label("z", i) in self.index.by_out
+            assert (
+                sum(
+                    len(self.index.by_inputs.get((cls, frozenset(xy_labels(i))), ()))
+                    for cls in (And, Or, Xor)
+                )
+                == 2
+            )
+        # per rank: (carry in, defects, carry out, labels looked at)
+        self.ranks = [None] * self.len_xy
+
+    def check_rank(self, i, c):
+        """Return (defects, carry out, labels looked at) for rank i given carry c."""
+        index = self.index
+        children = index.children
+        defects = set()
         x, y, z = label("x", i), label("y", i), label("z", i)
         if len(children[x]) != 2:
             defects.add(f"len(children[{x}]) != 2")
@@ -197,59 +296,64 @@ def calc_defects(wires, swaps):
             defects.add(f"len(children[{z}]) != 0")
 
         if i == 0:
-            if u := find_child(wires, {x, y}, And):
-                u = u.out
-            else:
+            if not (u := index.find_child({x, y}, And)):
                 defects.add(f"u := find_child(wires, {x}, {y}, And):")
-
-            if v := find_child(wires, {x, y}, Xor):
-                v = v.out
-            else:
+            if not (v := index.find_child({x, y}, Xor)):
                 defects.add(f"v := find_child(wires, {x}, {y}, Xor):")
+            return defects, u, {x, y, z, u, v}
+
+        # full adder
+        # u = x&y, v = x^y, w = v&c, z = v^c, C = u|w
+        # xy
+        # uvc data flows between adjacent /connected wires except uw
+        # |wZ
+        # C
+        if not (u := index.find_child({x, y}, And)) and x and y:
+            defects.add(FindChildError({x, y}, And, i))
+        if not (v := index.find_child({x, y}, Xor)) and x and y:
+            defects.add(FindChildError({x, y}, Xor, i))
+        if not (w := index.find_child({v, c}, And)) and v and c:
+            defects.add(FindChildError({v, c}, And, i))
+        if not (Z := index.find_child({v, c}, Xor)) and v and c:
+            defects.add(FindChildError({v, c}, Xor, i))
+        for parent, expected in [(u, 1), (v, 2), (w, 1)]:
+            if parent is None:
+                continue
+            if (actual := len(children[parent])) != expected:
+                defects.add(ChildrenLengthError(parent, expected, actual, i))
+        if Z not in (z, None):
+            defects.add(WireNameError(Z, z, i))
+        if not (C := index.find_child({u, w}, Or)) and u and w:
+            defects.add(FindChildError({u, w}, Or, i))
+        return defects, C, {x, y, z, c, u, v, w, Z, C}
+
+    def defects(self, swapped=()):
+        """Return the defects of all ranks, rechecking only ranks that looked at a label
+        in swapped or whose incoming carry changed.
+        """
+        swapped = set(swapped)
+        defects = set()
+        c = None
+        for i in range(self.len_xy):
+            cached = self.ranks[i]
+            if cached is None or cached[0] != c or not swapped.isdisjoint(cached[3]):
+                rank_defects, carry, looked_at = self.check_rank(i, c)
+                cached = self.ranks[i] = (c, rank_defects, carry, looked_at)
+            defects |= cached[1]
+            c = cached[2]
+        return defects
+
+    def swap(self, s0, s1):
+        """Swap two outputs and return the defects of the result."""
+        self.index.swap(s0, s1)
+        return self.defects(swapped=(s0, s1))
 
-            c = u
-        else:
-            # full adder
-            # u = x&y, v = x^y, w = v&c, z = v^c, C = u|w
-            # xy
-            # uvc data flows between adjacent /connected wires except uw
-            # |wZ
-            # C
-
-            if not isinstance(c, str):
-                pass
-
-            u = v = w = Z = C = None
-
-            if u := find_child(wires, {x, y}, And):
-                u = u.out
-            elif x and y:
-                defects.add(FindChildError({x, y}, And, i))
-            if v := find_child(wires, {x, y}, Xor):
-                v = v.out
-            elif x and y:
-                defects.add(FindChildError({x, y}, Xor, i))
-            if w := find_child(wires, {v, c}, And):
-                w = w.out
-            elif v and c:
-                defects.add(FindChildError({v, c}, And, i))
-            if Z := find_child(wires, {v, c}, Xor):
-                Z = Z.out
-            elif v and c:
-                defects.add(FindChildError({v, c}, Xor, i))
-            for parent, expected in [(u, 1), (v, 2), (w, 1)]:
-                if parent is None:
-                    continue
-                if (actual := len(children[parent])) != expected:
-                    defects.add(ChildrenLengthError(parent, expected, actual, i))
-            if Z not in (z, None):
-                defects.add(WireNameError(Z, z, i))
-            if C := find_child(wires, {u, w}, Or):
-                C = C.out
-            elif u and w:
-                defects.add(FindChildError({u, w}, Or, i))
-            c = C
-    return defects
+
+def calc_defects(wires, swaps):
+    verifier = AdderVerifier(wires)
+    for s0, s1 in swaps:
+        verifier.index.swap(s0, s1)
+    return verifier.defects()
 
 
 def calc_suspect_swaps(candidate_swaps, defects):
@@ -263,44 +367,175 @@ def calc_suspect_swaps(candidate_swaps, defects):
 
 def calc_defects_score(defects):
     """lower is better"""
-    return -min((defect.rank for defect in defects), default=100)
+    return -min((defect.rank for defect in defects), default=math.inf)
+
+
+def score_swaps(verifier, candidates):
+    """Return the defects score for each candidate swap applied to verifier on its own.
+    Each swap is undone after scoring.
+    """
+    scores = []
+    for swap in candidates:
+        scores.append(calc_defects_score(verifier.swap(*swap)))
+        verifier.swap(*swap)
+    return scores
+
+
+# State for worker processes, which receive the wires once, on start up.  Swaps are only
+# ever appended, so the number of swaps identifies the round.
+_worker_verifier = None
+_worker_swaps: list[tuple[str, str]] = []
+
 
+def _init_worker(wires):
+    global _worker_verifier
+    _worker_verifier = AdderVerifier(wires)
 
-def run_part2b(wires):
+
+def _worker_score_swaps(swaps, candidates):
+    """Bring the worker's verifier up to date with swaps, then score candidates.  The
+    verifier is only resynced on the first task a worker gets in each round.
+    """
+    global _worker_swaps
+    if len(swaps) != len(_worker_swaps):
+        for swap in swaps[len(_worker_swaps) :]:
+            _worker_verifier.index.swap(*swap)
+        changed = {label for swap in swaps[len(_worker_swaps) :] for label in swap}
+        _worker_verifier.defects(swapped=changed)
+        _worker_swaps = list(swaps)
+    return score_swaps(_worker_verifier, candidates)
+
+
+def find_improving_swap(
+    verifier, swaps, suspects, score, executor, n_workers, chunk_size
+):
+    """Return (swap, n_evaluated), where swap is the first swap in suspects that improves
+    on score, or None if none does, and n_evaluated counts the suspects scored.
+
+    With an executor, chunks of suspects are scored in parallel a wave at a time, and
+    the first improvement in suspect order wins, so the result doesn't depend on the
+    number of workers.
+    """
+    if executor is None:
+        for i, swap in enumerate(suspects):
+            if score_swaps(verifier, [swap])[0] < score:
+                return swap, i + 1
+        return None, len(suspects)
+
+    wave_size = chunk_size * n_workers
+    for start in range(0, len(suspects), wave_size):
+        wave = suspects[start : start + wave_size]
+        chunks = [wave[i : i + chunk_size] for i in range(0, len(wave), chunk_size)]
+        scores = itertools.chain.from_iterable(
+            executor.map(_worker_score_swaps, itertools.repeat(list(swaps)), chunks)
+        )
+        for i, candidate_score in enumerate(list(scores)):
+            if candidate_score < score:
+                return wave[i], start + len(wave)
+    return None, len(suspects)
+
+
+def run_part2b(wires, n_workers=1, chunk_size=32):
     """A pretty brute force approach.  Could be made faster / simpler but there's a trade
     off between how general to make it and how much to tune to the specific problem.
+
+    With n_workers > 1 suspect swaps are scored across a process pool.  Each worker gets
+    the wires once and keeps its own verifier, applying only the new swap at the start of
+    each round.  Scoring a swap takes well under a millisecond, so the pool only pays off
+    with several cores free and large adders or many suspects per round: it costs a
+    process start up, a pickled chunk per task and up to a wave of scored suspects
+    past the first improvement.  On a single core it is slower than the serial search.
     """
     swaps = []
 
-    output_labels = [w.out for w in wires if not isinstance(w, Constant)]
+    output_labels = sorted(w.out for w in wires if not isinstance(w, Constant))
     candidate_swaps = [
         (output_labels[i], output_labels[j])
         for i in range(len(output_labels))
         for j in range(i)
     ]
 
-    defects = calc_defects(wires, swaps)
+    verifier = AdderVerifier(wires)
+    defects = verifier.defects()
+
+    executor = None
+    if n_workers > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(
+            n_workers, initializer=_init_worker, initargs=(wires,)
+        )
 
     print()
-    while defects:
-        print(f"{swaps=}")
-        print(f"{defects=}")
-        print(f"{calc_defects_score(defects)=}")
-
-        for swap in calc_suspect_swaps(candidate_swaps, defects):
-            if calc_defects_score(
-                calc_defects(wires, swaps + [swap])
-            ) < calc_defects_score(defects):
-                break
-        else:
-            raise Exception("Could not find a swap to improve things")
-        swaps.append(swap)
-        defects = calc_defects(wires, swaps)
+    try:
+        while defects:
+            print(f"{swaps=}")
+            print(f"{defects=}")
+            print(f"{calc_defects_score(defects)=}")
+
+            start_time = time.time()
+            suspects = calc_suspect_swaps(candidate_swaps, defects)
+            swap, n_evaluated = find_improving_swap(
+                verifier,
+                swaps,
+                suspects,
+                calc_defects_score(defects),
+                executor,
+                n_workers,
+                chunk_size,
+            )
+            print(
+                f"evaluated {n_evaluated} of {len(suspects)} suspect swaps"
+                f" in {time.time() - start_time:.4f} seconds"
+            )
+            if swap is None:
+                raise Exception("Could not find a swap to improve things")
+            swaps.append(swap)
+            defects = verifier.swap(*swap)
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
     print(f"{swaps=}")
     return ",".join(sorted(el for swap in swaps for el in swap))
 
 
+def synthetic_adder(n_bits, swaps=(), seed=0):
+    """Return the wires of an n_bits ripple-carry adder with random inputs and randomly
+    named internal wires, with the outputs in swaps exchanged.
+    """
+    rng = random.Random(seed)
+    # internal names avoid the x, y and z prefixes of inputs and outputs
+    letters = "abcdefghijklmnopqrstuvw"
+    names = iter(rng.sample(range(len(letters) ** 3), 4 * n_bits))
+
+    def fresh():
+        n = next(names)
+        return "".join(
+            letters[(n // len(letters) ** k) % len(letters)] for k in range(3)
+        )
+
+    wires = set()
+    for i in range(n_bits):
+        for c in "xy":
+            wires.add(Constant(out=label(c, i), c=rng.randrange(2)))
+    x, y = label("x", 0), label("y", 0)
+    wires.add(Xor(out=label("z", 0), a=x, b=y))
+    carry = fresh()
+    wires.add(And(out=carry, a=x, b=y))
+    for i in range(1, n_bits):
+        x, y = label("x", i), label("y", i)
+        u, v, w = fresh(), fresh(), fresh()
+        out_carry = label("z", n_bits) if i == n_bits - 1 else fresh()
+        wires |= {
+            And(out=u, a=x, b=y),
+            Xor(out=v, a=x, b=y),
+            And(out=w, a=v, b=carry),
+            Xor(out=label("z", i), a=v, b=carry),
+            Or(out=out_carry, a=u, b=w),
+        }
+        carry = out_carry
+    return apply_swaps(wires, swaps)
+
+
 def run(input_file, part, skip=False):
     if skip:
         return None
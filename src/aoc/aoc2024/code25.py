@@ -1,51 +1,88 @@
-import re
-
 import aoc.helpers as helpers
 
 
-def calc_run(s):
-    run = 0
-    for letter in s:
-        if letter == "#":
-            run += 1
-        else:
-            break
-    return run
+def schematic_mask(section):
+    """Pack a schematic into an int, column by column, with bit col * nrows + row set for
+    each '#'.
+    """
+    nrows = len(section)
+    mask = 0
+    for row, line in enumerate(section):
+        for col, char in enumerate(line):
+            if char == "#":
+                mask |= 1 << (col * nrows + row)
+    return mask
 
 
 def process_sections(sections):
+    """Return (locks, keys, shape) with locks and keys as masks from schematic_mask and
+    shape as (nrows, ncols).
+    """
     keys = []
     locks = []
+    shape = (len(sections[0]), len(sections[0][0]))
 
     for section in sections:
-        if re.fullmatch("#+", section[0]):
-            lock = []
-            for s in helpers.transpose(section):
-                lock.append(calc_run(s) - 1)
-            locks.append(tuple(lock))
-        elif re.fullmatch("#+", section[-1]):
-            key = []
-            for s in helpers.transpose(section):
-                key.append(calc_run(reversed(s)) - 1)
-            keys.append(tuple(key))
+        assert (len(section), len(section[0])) == shape
+        if set(section[0]) == {"#"}:
+            locks.append(schematic_mask(section))
+        elif set(section[-1]) == {"#"}:
+            keys.append(schematic_mask(section))
         else:
-            raise ValueError("Unexpected section " + section)
-    return locks, keys
+            raise ValueError(f"Unexpected section {section}")
+    return locks, keys, shape
+
+
+def heights(mask, shape):
+    """Return the height profile of a lock or key mask, not counting the full row."""
+    nrows, ncols = shape
+    column = (1 << nrows) - 1
+    return tuple(
+        ((mask >> (col * nrows)) & column).bit_count() - 1 for col in range(ncols)
+    )
 
 
 def fits(lock, key):
-    return all(
-        lock_height + key_height <= 5 for lock_height, key_height in zip(lock, key)
+    """A lock and key fit when no column has both a lock pin and a key tooth."""
+    return lock & key == 0
+
+
+def count_fits(locks, keys, shape):
+    """Count the unique (lock, key) pairs that fit, without comparing all pairs.
+
+    Duplicate locks and keys are dropped, as the puzzle counts unique pairs, so each
+    distinct mask, and so each height profile, is one bucket.  A lock with heights h fits
+    a key with heights k when k <= max_height - h in every column, so a cumulative count
+    of keys over the grid of height profiles answers each lock bucket in O(1).
+    """
+    nrows, ncols = shape
+    max_height = nrows - 2
+    side = max_height + 1
+
+    def flat(profile):
+        index = 0
+        for height in profile:
+            index = index * side + height
+        return index
+
+    # cumulative[flat(a)] counts keys with heights <= a in every column
+    cumulative = [0] * side**ncols
+    for key in set(keys):
+        cumulative[flat(heights(key, shape))] += 1
+    for col in range(ncols):
+        stride = side ** (ncols - 1 - col)
+        for index in range(len(cumulative)):
+            if (index // stride) % side:
+                cumulative[index] += cumulative[index - stride]
+
+    return sum(
+        cumulative[flat(max_height - h for h in heights(lock, shape))]
+        for lock in set(locks)
     )
 
 
-def run_part1(locks, keys):
-    matches = set()
-    for lock in locks:
-        for key in keys:
-            if fits(lock, key):
-                matches.add((lock, key))
-    return len(matches)
+def run_part1(locks, keys, shape):
+    return count_fits(locks, keys, shape)
 
 
 def run_part2(processed_input):
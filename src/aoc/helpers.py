@@ -4,6 +4,7 @@ from typing import Tuple, Iterator
 from dataclasses import dataclass
 from enum import Enum
 import time
+import tracemalloc
 
 
 def transpose(matrix):
@@ -104,11 +105,56 @@ def topo_sort(nodes: set[int], pairs: list[tuple[int, int]]) -> list[int]:
     return list(visited)
 
 
+class UnionFind:
+    """Disjoint sets over the integers 0..n-1, with path halving and union by size."""
+
+    def __init__(self, n: int) -> None:
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, x: int, y: int) -> int:
+        """Merge the sets containing x and y and return the root of the merged set."""
+        x, y = self.find(x), self.find(y)
+        if x == y:
+            return x
+        if self.size[x] < self.size[y]:
+            x, y = y, x
+        self.parent[y] = x
+        self.size[x] += self.size[y]
+        return x
+
+    def connected(self, x: int, y: int) -> bool:
+        return self.find(x) == self.find(y)
+
+
+# Run the invariant checks of the value types below on construction.  Defaults to off
+# under python -O, and can be set directly for production runs.
+VALIDATE = __debug__
+
+
 class RectOffset:
+    """An (i, j) offset on a rectangular grid.  Instances are immutable, which lets the
+    hash be computed once on construction.
+    """
+
+    __slots__ = ("_hash", "i", "j")
+
     def __init__(self, i, j):
-        self.i = i
-        self.j = j
-        self.__check__()
+        object.__setattr__(self, "i", i)
+        object.__setattr__(self, "j", j)
+        object.__setattr__(self, "_hash", hash((i, j)))
+        if VALIDATE:
+            self.__check__()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
 
     def __str__(self):
         return f"RectOffset(i={self.i}, j={self.j})"
@@ -120,11 +166,11 @@ class RectOffset:
 
     def __eq__(self, other):
         if isinstance(other, RectOffset):
-            return self._tuple() == other._tuple()
+            return self.i == other.i and self.j == other.j
         return False
 
     def __hash__(self):
-        return hash(self._tuple())
+        return self._hash
 
     def __add__(self, other):
         assert isinstance(other, RectOffset)
@@ -136,12 +182,22 @@ class RectOffset:
 
 
 class RectCoord:
+    """An (i, j) position on a grid of nrows by ncols.  As with RectOffset, instances are
+    immutable and the hash is computed once on construction.
+    """
+
+    __slots__ = ("_hash", "i", "j", "ncols", "nrows")
+
     def __init__(self, nrows, ncols, i, j):
-        self.nrows = nrows
-        self.ncols = ncols
-        self.i = i
-        self.j = j
-        self.__check__()
+        object.__setattr__(self, "nrows", nrows)
+        object.__setattr__(self, "ncols", ncols)
+        object.__setattr__(self, "i", i)
+        object.__setattr__(self, "j", j)
+        object.__setattr__(self, "_hash", hash((nrows, ncols, i, j)))
+        if VALIDATE:
+            self.__check__()
+
+    __setattr__ = RectOffset.__setattr__
 
     def __str__(self):
         return (
@@ -155,11 +211,16 @@ class RectCoord:
 
     def __eq__(self, other):
         if isinstance(other, RectCoord):
-            return self._tuple() == other._tuple()
+            return (
+                self.i == other.i
+                and self.j == other.j
+                and self.nrows == other.nrows
+                and self.ncols == other.ncols
+            )
         return False
 
     def __hash__(self):
-        return hash(self._tuple())
+        return self._hash
 
     def __add__(self, other):
         if isinstance(other, (tuple, list)):
@@ -175,11 +236,8 @@ class RectCoord:
         raise TypeError(f"Unexpected type for {other}")
 
     def __check__(self):
-        try:
-            assert 0 <= self.i < self.nrows
-            assert 0 <= self.j < self.ncols
-        except AssertionError as e:
-            raise IndexError("index out of range") from e
+        if not (0 <= self.i < self.nrows and 0 <= self.j < self.ncols):
+            raise IndexError("index out of range")
 
 
 class RectGrid:
@@ -207,6 +265,9 @@ class RectGrid:
         assert isinstance(coordinates, RectCoord)
         return coordinates
 
+    def _row(self, i):
+        return self._text[i]
+
     def __getitem__(self, coordinates):
         i, j = coordinates
         return self._text[i][j]
@@ -247,6 +308,82 @@ class RectGrid:
                 if 0 <= npos[1] < self.ncols:
                     yield npos
 
+    def copy(self):
+        """Return an independent copy of this grid.  Rows are immutable strings, so only
+        the list of rows is copied.
+        """
+        return RectGrid(self._text)
+
+    def snapshot(self):
+        """Return a GridSnapshot of this grid, for edits that can be committed back to it
+        or rolled back.
+        """
+        return GridSnapshot(self)
+
+
+class GridSnapshot(RectGrid):
+    """A copy-on-write view of a RectGrid.
+
+    Writes go to a per-row overlay of changed cells, and every other read falls through
+    to the parent, so the view sees later edits the parent makes to cells it hasn't
+    written.  Creating a view is constant time and edits cost in proportion to the cells
+    they touch.  commit() writes the changed cells to the parent, which may itself be a
+    snapshot, and rollback() discards them.
+    """
+
+    def __init__(self, parent: RectGrid):
+        self.parent = parent
+        self.nrows = parent.nrows
+        self.ncols = parent.ncols
+        self._overlay: dict[int, dict[int, str]] = dict()
+
+    def _row(self, i):
+        row = self.parent._row(i)
+        cells = self._overlay.get(i)
+        if cells:
+            chars = list(row)
+            for j, value in cells.items():
+                chars[j] = value
+            row = "".join(chars)
+        return row
+
+    def __str__(self):
+        return "\n".join(self._row(i) for i in range(self.nrows))
+
+    def copy(self):
+        return RectGrid([self._row(i) for i in range(self.nrows)])
+
+    def __getitem__(self, coordinates):
+        i, j = coordinates
+        cells = self._overlay.get(i)
+        if cells is not None and j in cells:
+            return cells[j]
+        return self.parent[i, j]
+
+    def __setitem__(self, coordinates, value):
+        coordinates = self._to_coord(coordinates)
+        self._overlay.setdefault(coordinates.i, dict())[coordinates.j] = value
+
+    def values(self):
+        for i in range(self.nrows):
+            yield from self._row(i)
+
+    def items(self):
+        for i in range(self.nrows):
+            for j, value in enumerate(self._row(i)):
+                yield (i, j), value
+
+    def commit(self):
+        """Write the cells changed since the last commit or rollback to the parent."""
+        for i, cells in self._overlay.items():
+            for j, value in cells.items():
+                self.parent[i, j] = value
+        self._overlay.clear()
+
+    def rollback(self):
+        """Discard the cells changed since the last commit or rollback."""
+        self._overlay.clear()
+
 
 class Timer:
     def __enter__(self):
@@ -259,6 +396,20 @@ class Timer:
         print(f"Elapsed time: {self.elapsed_time:.4f} seconds")
 
 
+class MemoryTimer(Timer):
+    """Like Timer, but also print the peak memory allocated within the block."""
+
+    def __enter__(self):
+        tracemalloc.start()
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        _, self.peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"Peak memory: {self.peak_memory / 2**20:.1f} MiB")
+
+
 class PuzzleSize(Enum):
     EXAMPLE = "example"
     FULL = "full"
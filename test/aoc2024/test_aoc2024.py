@@ -15,9 +15,13 @@ These are defined in a data structure for all tests stored in the testing code.
 
 """
 
+import random
+
 import pytest
 from pathlib import Path
 
+from aoc.helpers import read_input_sections
+
 INPUT_FILES_DIR = Path(__file__).parent / "data"
 HEAVY_PUZZLES = {6, 24}
 KWARGS = {
@@ -167,3 +171,539 @@ def test_puzzle(puzzle, part, input_type):
         assert (
             result == expected_result
         ), f"Failed for puzzle {puzzle}, part {part}, input_type {input_type}"
+
+
+def read_input(puzzle, input_type):
+    file_path = Path(INPUT_FILES_DIR) / f"{input_type}{puzzle:02d}.txt"
+    with open(file_path, "r") as input_file:
+        return read_input_sections(input_file)
+
+
+@pytest.mark.parametrize("input_type", ["example", "full"])
+def test_code16_run_parts(input_type):
+    from aoc.aoc2024 import code16
+
+    grids = code16.process_sections(read_input(16, input_type))
+    assert code16.run_parts(grids) == (
+        EXPECTED_RESULTS[16][1][input_type],
+        EXPECTED_RESULTS[16][2][input_type],
+    )
+
+
+@pytest.mark.parametrize("input_type", ["example", "full"])
+def test_code17_compiled_matches_interpreter(input_type):
+    from aoc.aoc2024 import code17
+
+    sections = read_input(17, input_type)
+    rng = random.Random(17)
+    programs = [
+        code17.process_sections(sections[:2])[1],
+        code17.process_sections(sections[2:4])[1],
+    ] + [code17.random_program(rng, rng.randrange(1, 8)) for _ in range(20)]
+    # straight-line programs, without the final jnz
+    programs += [code17.random_program(rng, rng.randrange(1, 8))[:-2] for _ in range(5)]
+    # general programs: a jnz before the end, a nested loop, and a jnz to an odd address
+    # (3) with an invalid instruction at another odd address (7) that is never run
+    programs += [
+        [0, 1, 5, 4, 3, 0, 5, 5, 1, 3, 5, 5],
+        [0, 3, 3, 6, 5, 4, 0, 1, 5, 4, 3, 0],
+        [0, 1, 3, 3, 0, 1, 5, 5, 7, 1],
+        [],
+    ]
+    a_values = [0, 1, 7, 8] + [rng.getrandbits(40) for _ in range(50)]
+    for program in programs:
+        assert code17.differential_check(program, a_values) == []
+
+    # running onto the last address, which has no operand, fails in both
+    for program, a in [([3, 1, 0, 3], 1), ([0, 1, 3, 3, 0, 1, 5], 5), ([5], 0)]:
+        registers = {"A": a, "B": 0, "C": 0}
+        with pytest.raises(IndexError):
+            code17.run_program(registers=registers, program=program)
+        with pytest.raises(IndexError):
+            code17.run_compiled(registers=registers, program=program)
+
+
+def test_code17_solve_for_output():
+    from aoc.aoc2024 import code17
+
+    rng = random.Random(28)
+    n_solved = 0
+    for _ in range(100):
+        program = code17.random_program(rng, rng.randrange(1, 8))
+        try:
+            code17.analyze_loop(program)
+        except ValueError:
+            continue
+        a = rng.getrandbits(30)
+        registers = {"A": a, "B": 0, "C": 0}
+        target = code17.run_compiled(registers=registers, program=program)
+        result = code17.solve_for_output(program, target)
+        assert result is not None and result <= a
+        n_solved += 1
+    assert n_solved > 10
+
+
+@pytest.mark.parametrize(
+    "program",
+    [
+        [2, 4, 3, 0],  # no output
+        [5, 4, 5, 4, 0, 3, 3, 0],  # two outputs per iteration
+        [0, 3, 5, 4, 3, 2],  # jumps elsewhere
+        [5, 5, 2, 4, 0, 3, 3, 0],  # output depends on the previous iteration
+        [7, 4, 5, 6, 0, 3, 3, 0],  # output depends on all of A
+    ],
+)
+def test_code17_analyze_loop_rejects(program):
+    from aoc.aoc2024 import code17
+
+    with pytest.raises(ValueError):
+        code17.analyze_loop(program)
+
+
+def test_code18_bidirectional_bfs_matches_dijkstra():
+    from aoc.aoc2024 import code18
+
+    rng = random.Random(18)
+    for _ in range(50):
+        width, height = rng.randrange(1, 12), rng.randrange(1, 12)
+        xys = [
+            (rng.randrange(width), rng.randrange(height))
+            for _ in range(rng.randrange(width * height // 2 + 1))
+        ]
+        xys = [xy for xy in xys if xy not in ((0, 0), (width - 1, height - 1))]
+        args = (width, height, len(xys), xys)
+        assert code18.run_part1(*args) == code18.run_part1(*args, mode="dijkstra")
+
+
+def test_code20_cheat_histogram():
+    from aoc.aoc2024 import code20
+
+    grid = code20.process_sections(read_input(20, "example"))
+    path = code20.track_path(grid)
+    histogram = code20.CheatHistogram(path, max_radius=20)
+    # from the puzzle description
+    assert histogram.histogram(2) == {
+        2: 14,
+        4: 14,
+        6: 2,
+        8: 4,
+        10: 2,
+        12: 3,
+        20: 1,
+        36: 1,
+        38: 1,
+        40: 1,
+        64: 1,
+    }
+    assert histogram.count(20, 76) == 3
+    assert histogram.count(20, 50) == 285
+    assert code20.run_parts(grid, threshold=50) == [1, 285]
+    for radius in [2, 5, 20]:
+        for threshold in [1, 10, 50, 100]:
+            assert histogram.count(radius, threshold) == code20.count_cheats(
+                path, radius, threshold
+            )
+
+
+def test_code23_maximum_clique():
+    import itertools
+
+    from aoc.aoc2024 import code23
+
+    rng = random.Random(23)
+    for _ in range(30):
+        names = [f"n{i:02d}" for i in range(rng.randrange(2, 12))]
+        edges = [
+            pair for pair in itertools.combinations(names, 2) if rng.random() < 0.5
+        ]
+        if not edges:
+            continue
+        nodes, adjacency = code23.bitset_adjacency(edges)
+        clique = list(code23.iter_bits(code23.maximum_clique(adjacency)))
+        assert all(adjacency[u] >> v & 1 for u, v in itertools.combinations(clique, 2))
+        neighbors = code23.create_neighbors(edges)
+        largest = max(
+            size
+            for size in range(1, len(nodes) + 1)
+            for subset in itertools.combinations(nodes, size)
+            if all(b in neighbors[a] for a, b in itertools.combinations(subset, 2))
+        )
+        assert len(clique) == largest
+
+
+def test_code23_triangles():
+    import itertools
+
+    from aoc.aoc2024 import code23
+
+    rng = random.Random(39)
+    for _ in range(30):
+        names = [f"{rng.choice('abt')}{i}" for i in range(rng.randrange(3, 15))]
+        edges = [
+            pair for pair in itertools.combinations(names, 2) if rng.random() < 0.4
+        ]
+        neighbors = code23.create_neighbors(edges)
+        expected = {
+            frozenset(triple)
+            for triple in itertools.combinations(neighbors, 3)
+            if all(b in neighbors[a] for a, b in itertools.combinations(triple, 2))
+        }
+        found = [frozenset(t) for t in code23.triangles(neighbors)]
+        assert len(found) == len(set(found)) and set(found) == expected
+
+        def predicate(node):
+            return node.startswith("t")
+
+        found = [frozenset(t) for t in code23.triangles(neighbors, predicate)]
+        assert len(found) == len(set(found))
+        assert set(found) == {t for t in expected if any(map(predicate, t))}
+
+
+def test_code24_simulate_adder():
+    from aoc.aoc2024 import code24
+
+    wires = code24.process_sections(read_input(24, "full"))
+    assert code24.simulate_adder(wires)
+    swaps = [("drg", "z22"), ("gvw", "qjb"), ("jbp", "z35"), ("jgc", "z15")]
+    assert code24.simulate_adder(code24.apply_swaps(wires, swaps)) == set()
+
+
+def test_code24_adder_verifier_incremental():
+    from aoc.aoc2024 import code24
+
+    wires = code24.process_sections(read_input(24, "full"))
+    outputs = sorted(w.out for w in wires if not isinstance(w, code24.Constant))
+    rng = random.Random(41)
+    verifier = code24.AdderVerifier(wires)
+    swaps = []
+    for _ in range(20):
+        swap = tuple(rng.sample(outputs, 2))
+        swaps.append(swap)
+        defects = verifier.swap(*swap)
+        fresh = code24.calc_defects(code24.apply_swaps(wires, swaps), [])
+        assert sorted(map(str, defects)) == sorted(map(str, fresh))
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_code24_run_part2b_synthetic(n_workers):
+    from aoc.aoc2024 import code24
+
+    wires = code24.synthetic_adder(24)
+    index = code24.GateIndex(wires)
+    swaps = []
+    for i in (5, 15):
+        # swap the sum and carry out of rank i
+        u = index.find_child({code24.label("x", i), code24.label("y", i)}, code24.And)
+        (carry,) = [
+            out
+            for out, gate in index.by_out.items()
+            if isinstance(gate, code24.Or) and u in (gate.a, gate.b)
+        ]
+        swaps.append((code24.label("z", i), carry))
+    wires = code24.apply_swaps(wires, swaps)
+    expected = ",".join(sorted(label for swap in swaps for label in swap))
+    assert code24.run_part2b(wires, n_workers=n_workers, chunk_size=8) == expected
+
+
+@pytest.mark.parametrize("input_type", ["example", "full"])
+def test_code25_count_fits_matches_unique_pairs(input_type):
+    from aoc.aoc2024 import code25
+
+    locks, keys, shape = code25.process_sections(read_input(25, input_type))
+    # the puzzle counts unique pairs, so duplicate locks and keys don't add to the count
+    for n_copies in [1, 2]:
+        locks, keys = locks * n_copies, keys * n_copies
+        expected = len(
+            {(lock, key) for lock in locks for key in keys if code25.fits(lock, key)}
+        )
+        assert code25.count_fits(locks, keys, shape) == expected
+
+
+def test_code02_is_one_safe_matches_brute_force():
+    from aoc.aoc2024 import code02
+
+    def brute_force_safe(levels):
+        deltas = [b - a for a, b in zip(levels, levels[1:])]
+        return all(1 <= d <= 3 for d in deltas) or all(-3 <= d <= -1 for d in deltas)
+
+    rng = random.Random(2)
+    for _ in range(2000):
+        levels = [rng.randrange(10) for _ in range(rng.randrange(1, 8))]
+        assert code02.is_safe(levels) == brute_force_safe(levels)
+        assert code02.is_one_safe(levels) == any(
+            brute_force_safe(levels[:i] + levels[i + 1 :])
+            for i in range(len(levels) + 1)
+        )
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64])
+@pytest.mark.parametrize("input_type", ["example", "full"])
+def test_code03_chunk_size_independent(input_type, chunk_size):
+    from aoc.aoc2024 import code03
+
+    file_path = Path(INPUT_FILES_DIR) / f"{input_type}03.txt"
+    for part in (1, 2):
+        with open(file_path, "r") as input_file:
+            result = code03.run(input_file, part, chunk_size=chunk_size)
+        assert result == EXPECTED_RESULTS[3][part][input_type]
+
+
+def test_code04_word_search_matches_brute_force():
+    from aoc.aoc2024 import code04
+
+    rng = random.Random(4)
+    for _ in range(200):
+        nrows, ncols = rng.randrange(1, 7), rng.randrange(1, 7)
+        lines = [
+            "".join(rng.choice("XMAS") for _ in range(ncols)) for _ in range(nrows)
+        ]
+        search = code04.WordSearch(lines)
+
+        def at(i, j):
+            return lines[i][j] if 0 <= i < nrows and 0 <= j < ncols else None
+
+        words = ["XMAS", "MAS"]
+        expected = sum(
+            all(at(i + k * di, j + k * dj) == char for k, char in enumerate(word))
+            for word in words
+            for di, dj in code04.DIRECTIONS
+            for i in range(nrows)
+            for j in range(ncols)
+        )
+        assert search.count_words(words) == expected
+
+        expected = sum(
+            all(
+                char in (".", at(i + r, j + c))
+                for r, row in enumerate(pattern)
+                for c, char in enumerate(row)
+            )
+            for pattern in code04.XMAS_MASKS
+            for i in range(nrows)
+            for j in range(ncols)
+        )
+        assert search.count_patterns(code04.XMAS_MASKS, anchor="A") == expected
+
+
+def test_code08_resonant_slice_matches_collinear_points():
+    from aoc.aoc2024 import code08
+
+    rng = random.Random(8)
+    for _ in range(500):
+        nrows, ncols = rng.randrange(1, 9), rng.randrange(1, 9)
+        if nrows * ncols < 2:
+            continue
+        (i1, j1), (i2, j2) = rng.sample(
+            [(i, j) for i in range(nrows) for j in range(ncols)], 2
+        )
+        expected = [
+            i * ncols + j
+            for i in range(nrows)
+            for j in range(ncols)
+            if (i - i1) * (j2 - j1) == (j - j1) * (i2 - i1)
+        ]
+        line = code08.resonant_slice(nrows, ncols, i1, j1, i2, j2)
+        assert list(range(nrows * ncols)[line]) == expected
+
+
+def test_rect_coord_validation_switch(monkeypatch):
+    import aoc.helpers as helpers
+
+    coord = helpers.RectCoord(3, 4, 1, 2)
+    assert coord == helpers.RectCoord(3, 4, 1, 2)
+    assert hash(coord) == hash(helpers.RectCoord(3, 4, 1, 2))
+    assert coord + helpers.RectOffset(1, 1) == helpers.RectCoord(3, 4, 2, 3)
+    assert (
+        len({coord, helpers.RectCoord(3, 4, 1, 2), helpers.RectCoord(3, 4, 2, 1)}) == 2
+    )
+    with pytest.raises(IndexError):
+        coord + (2, 0)
+
+    monkeypatch.setattr(helpers, "VALIDATE", False)
+    assert (coord + (2, 0)).i == 3
+
+
+def test_rect_grid_snapshot():
+    import aoc.helpers as helpers
+
+    grid = helpers.RectGrid(["...", "...", "..."])
+    snapshot = grid.snapshot()
+    snapshot[0, 1] = "#"
+    assert str(snapshot) == ".#.\n...\n..."
+    assert str(grid) == "...\n...\n..."
+    snapshot.rollback()
+    assert str(snapshot) == str(grid)
+
+    snapshot[1, 1] = "#"
+    nested = snapshot.snapshot()
+    nested[2, 2] = "#"
+    nested.commit()
+    assert str(snapshot) == "...\n.#.\n..#"
+    assert str(grid) == "...\n...\n..."
+    snapshot.commit()
+    assert str(grid) == "...\n.#.\n..#"
+
+
+def test_rect_grid_snapshot_sees_parent_edits():
+    import aoc.helpers as helpers
+
+    grid = helpers.RectGrid(["...", "..."])
+    snapshot = grid.snapshot()
+    grid[0, 0] = "#"
+    assert snapshot[0, 0] == "#"
+    snapshot[0, 2] = "#"
+    assert str(snapshot) == "#.#\n..."
+    snapshot.commit()
+    assert str(grid) == "#.#\n..."
+
+
+def test_code16_unbordered_grid():
+    from aoc.aoc2024 import code16
+    from aoc.helpers import RectGrid
+
+    assert code16.run_part1([RectGrid(["S.E"])]) == [2]
+    assert code16.run_part1([RectGrid(["E..", "..S"])]) == [2003]
+    assert code16.run_part2([RectGrid(["E..", "..S"])]) == [4]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64])
+def test_code01_read_columns_chunked(chunk_size):
+    import io
+    from collections import Counter
+
+    from aoc.aoc2024 import code01
+
+    rng = random.Random(1)
+    pairs = [(rng.randrange(20), rng.randrange(20)) for _ in range(200)]
+    text = "".join(f"{a}   {b}\n" for a, b in pairs)
+    left, right = code01.read_columns(io.StringIO(text), chunk_size=chunk_size)
+    assert list(left) == [a for a, _ in pairs]
+    assert list(right) == [b for _, b in pairs]
+
+    counts = Counter(right)
+    expected = sum(a * counts[a] for a in left)
+    left, right = code01.sorted_column(left), code01.sorted_column(right)
+    assert code01.similarity_score(left, right) == expected
+
+
+def test_code22_packed_lanes_match_scalar():
+    from aoc.aoc2024 import code22
+
+    rng = random.Random(22)
+    top = code22.PRUNE_MASK
+    init_sns = [0, 1, 123, top, top - 1, top ^ 1, 1 << 23] + [
+        rng.choice([rng.randrange(top + 1), top - rng.randrange(64)]) for _ in range(40)
+    ]
+    rng.shuffle(init_sns)
+
+    n = 60
+    expected = [init_sns]
+    for _ in range(n):
+        expected.append([code22.next_sn(sn) for sn in expected[-1]])
+    assert [list(row) for row in code22.generate_sns(init_sns, n)] == expected
+
+    prices, deltas = code22.price_and_delta_matrices(init_sns, n)
+    for buyer in range(len(init_sns)):
+        buyer_prices = [row[buyer] % 10 for row in expected]
+        assert list(prices[buyer]) == buyer_prices
+        assert list(deltas[buyer]) == [
+            b - a + code22.DELTA_OFFSET for a, b in zip(buyer_prices, buyer_prices[1:])
+        ]
+
+
+def test_code22_merge_totals_and_workers():
+    from aoc.aoc2024 import code22
+
+    rng = random.Random(37)
+    init_sns = [rng.randrange(code22.PRUNE_MASK + 1) for _ in range(12)]
+    whole = code22.window_totals(init_sns, n=200)
+    parts = [init_sns[:5], init_sns[5:6], init_sns[6:]]
+    merged = code22.merge_totals(code22.window_totals(part, n=200) for part in parts)
+    assert merged == whole
+
+    assert code22.run_part2(init_sns, n_workers=2) == code22.run_part2(init_sns)
+
+
+def code21_brute_force_cost(keypads, seq):
+    """Fewest presses on the first of keypads to type seq on the last, by breadth first
+    search over the positions of the robot arms on the other keypads.
+    """
+    from collections import deque
+
+    from aoc.aoc2024 import code21
+
+    start = (tuple(keypad.positions["A"] for keypad in keypads[1:]), 0)
+    depths = {start: 0}
+    queue = deque([start])
+    while queue:
+        state = queue.popleft()
+        arms, typed = state
+        if typed == len(seq):
+            return depths[state]
+        for key in keypads[0].keys:
+            new_arms = list(arms)
+            for level, keypad in enumerate(keypads[1:]):
+                if key != "A":
+                    di, dj = code21.MOVES[key]
+                    i, j = new_arms[level]
+                    new_arms[level] = (i + di, j + dj)
+                    key = None
+                    break
+                key = next(
+                    k for k, pos in keypad.positions.items() if pos == arms[level]
+                )
+            if key is not None:
+                if key != seq[typed]:
+                    continue
+                new_state = (arms, typed + 1)
+            else:
+                if any(
+                    arm not in keypad.cells
+                    for arm, keypad in zip(new_arms, keypads[1:])
+                ):
+                    continue
+                new_state = (tuple(new_arms), typed)
+            if new_state not in depths:
+                depths[new_state] = depths[state] + 1
+                queue.append(new_state)
+    return None
+
+
+def test_code21_custom_keypad():
+    from aoc.aoc2024 import code21
+
+    # the bottom right corner is off the end of the last row, so it is a gap
+    keypad = code21.Keypad("A12\n345\n67")
+    assert keypad.moves["2", "6"] == ["<<vvA"]
+    assert keypad.moves["6", "2"] == ["^^>>A"]
+    assert keypad.moves["5", "7"] == ["<vA"]
+
+    rng = random.Random(35)
+    keypads = [code21.DIRECTIONAL_KEYPAD, code21.DIRECTIONAL_KEYPAD, keypad]
+    costs = code21.cost_matrix(keypads)
+    for _ in range(10):
+        seq = "".join(rng.choice(keypad.keys) for _ in range(4))
+        expected = code21_brute_force_cost(keypads, seq)
+        assert code21.sequence_cost(seq, costs) == expected
+
+
+
+def test_code21_cost_matrix_matches_brute_force():
+    from aoc.aoc2024 import code21
+
+    keypads = [code21.DIRECTIONAL_KEYPAD] * 3 + [code21.NUMERIC_KEYPAD]
+    costs = code21.cost_matrix(keypads)
+    for seq in ["029A", "980A", "179A", "456A", "379A"]:
+        expected = code21_brute_force_cost(keypads, seq)
+        assert code21.sequence_cost(seq, costs) == expected
+
+
+def test_rect_coord_immutable():
+    import aoc.helpers as helpers
+
+    coord, offset = helpers.RectCoord(3, 4, 1, 2), helpers.RectOffset(1, 2)
+    for value, name in [(coord, "i"), (coord, "nrows"), (offset, "j")]:
+        with pytest.raises(AttributeError):
+            setattr(value, name, 0)
+    assert coord == helpers.RectCoord(3, 4, 1, 2)
+    assert offset == helpers.RectOffset(1, 2)